@@ -0,0 +1,297 @@
+"""Внутрипроцессные кеши агрегатов, инвалидируемые по водяному знаку загрузки.
+
+Водяной знак — максимальный `loaded_at` по агрегатам (`LAST_UPDATED_SQL`).
+Пока он не меняется, данные в БД те же и пересчитывать их незачем.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from datetime import date
+from threading import Lock
+from typing import Any, Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class WatermarkLRUCache(Generic[K, V]):
+    """Потокобезопасный LRU-кеш, сбрасываемый при смене водяного знака.
+
+    Пример использования:
+
+        cached = cache.get(month_start, watermark)
+        if cached is None:
+            cached = compute(month_start)
+            cache.put(month_start, cached, watermark)
+    """
+
+    def __init__(self, maxsize: int, *, name: str = "cache") -> None:
+        self.name = name
+        self.maxsize = max(0, maxsize)
+        self._data: OrderedDict[K, V] = OrderedDict()
+        self._watermark: Any = None
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _sync_watermark(self, watermark: Any) -> None:
+        # Вызывается под блокировкой.
+        if watermark != self._watermark:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+            self._watermark = watermark
+
+    def get(self, key: K, watermark: Any) -> V | None:
+        """Возвращает значение, если оно посчитано при том же водяном знаке."""
+
+        with self._lock:
+            self._sync_watermark(watermark)
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: K, value: V, watermark: Any) -> None:
+        """Сохраняет значение, если водяной знак не сменился за время расчёта."""
+
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            if watermark != self._watermark:
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+class TieredWatermarkCache(Generic[K, V]):
+    """LRU-кеш агрегатов по периодам с разной политикой для закрытых и открытого периода.
+
+    Открытый период (текущий месяц/день) действителен, пока не сменился водяной
+    знак, и не дольше `open_ttl_sec` (если задан). Закрытый период после загрузки
+    почти не меняется: запись действительна `closed_ttl_sec` независимо от водяного
+    знака, а по истечении срока — пока водяной знак тот же, что при расчёте.
+
+    Пример использования:
+
+        closed = month_start < current_month_start
+        cached = cache.get(month_start, watermark, closed=closed)
+        if cached is None:
+            cached = compute(month_start)
+            cache.put(month_start, cached, watermark, closed=closed)
+    """
+
+    TIERS = ("closed", "open")
+
+    def __init__(
+        self,
+        maxsize: int,
+        *,
+        closed_ttl_sec: float,
+        open_ttl_sec: float | None = None,
+        name: str = "cache",
+    ) -> None:
+        self.name = name
+        self.maxsize = max(0, maxsize)
+        self.closed_ttl_sec = closed_ttl_sec
+        self.open_ttl_sec = open_ttl_sec
+        # key -> (value, watermark, сохранено (monotonic), закрытый ли период)
+        self._data: OrderedDict[K, tuple[V, Any, float, bool]] = OrderedDict()
+        self._lock = Lock()
+        self._hits = dict.fromkeys(self.TIERS, 0)
+        self._misses = dict.fromkeys(self.TIERS, 0)
+        self.evictions = 0
+
+    def _is_fresh(self, entry: tuple[V, Any, float, bool], watermark: Any, now: float) -> bool:
+        _, entry_watermark, stored_at, closed = entry
+        age = now - stored_at
+        if closed:
+            return age < self.closed_ttl_sec or entry_watermark == watermark
+        if entry_watermark != watermark:
+            return False
+        return self.open_ttl_sec is None or age < self.open_ttl_sec
+
+    def get(self, key: K, watermark: Any, *, closed: bool) -> V | None:
+        """Возвращает значение, если оно ещё действительно для своего уровня."""
+
+        tier = "closed" if closed else "open"
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[3] != closed or not self._is_fresh(entry, watermark, now):
+                if entry is not None:
+                    del self._data[key]
+                self._misses[tier] += 1
+                return None
+            self._data.move_to_end(key)
+            self._hits[tier] += 1
+            return entry[0]
+
+    def put(self, key: K, value: V, watermark: Any, *, closed: bool) -> None:
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._data[key] = (value, watermark, time.monotonic(), closed)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            tiers = {}
+            for tier in self.TIERS:
+                hits, misses = self._hits[tier], self._misses[tier]
+                tiers[tier] = {
+                    "size": sum(1 for entry in self._data.values() if entry[3] == (tier == "closed")),
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_ratio": hits / (hits + misses) if hits + misses else None,
+                }
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "evictions": self.evictions,
+                "tiers": tiers,
+            }
+
+
+class IncrementalSeriesCache(Generic[K, V]):
+    """LRU-кеш подневных рядов, в котором после загрузки пересчитывается только хвост.
+
+    Вместе с рядом хранится `open_from` — первый день, который при расчёте ещё
+    мог измениться (None — период закрыт целиком). Пока водяной знак тот же, ряд
+    отдаётся как есть; после смены достаточно дочитать дни начиная с `open_from`,
+    более ранние дни берутся из кеша. Как закрытый уровень `TieredWatermarkCache`,
+    сохранённые дни переживают загрузки не дольше `closed_ttl_sec`: после этого
+    первая загрузка перечитывает ряд целиком (поздние рассмотрения старых дней).
+
+    Пример использования:
+
+        series, since = cache.plan(month_start, watermark, start=month_start)
+        if since is not None:
+            tail = load(month_start, since)
+            series = cache.merge(month_start, series, tail, watermark, since=since, open_from=reopen_from)
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        *,
+        day: Callable[[V], date],
+        closed_ttl_sec: float,
+        name: str = "cache",
+    ) -> None:
+        self.name = name
+        self.maxsize = max(0, maxsize)
+        self.closed_ttl_sec = closed_ttl_sec
+        self._day = day
+        # key -> (ряд, watermark, open_from, когда ряд прочитан целиком (monotonic))
+        self._data: OrderedDict[K, tuple[list[V], Any, date | None, float]] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.partial = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def plan(self, key: K, watermark: Any, *, start: date) -> tuple[list[V], date | None]:
+        """Возвращает (известный ряд, с какого дня дочитать); None — дочитывать нечего."""
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return [], start
+            self._data.move_to_end(key)
+            series, entry_watermark, open_from, read_at = entry
+            if entry_watermark == watermark:
+                self.hits += 1
+                return series, None
+            if now - read_at >= self.closed_ttl_sec:
+                self.misses += 1
+                return [], start
+            if open_from is None:
+                self.hits += 1
+                return series, None
+            self.partial += 1
+            return series, open_from
+
+    def merge(
+        self,
+        key: K,
+        series: list[V],
+        tail: list[V],
+        watermark: Any,
+        *,
+        since: date,
+        open_from: date | None,
+    ) -> list[V]:
+        """Заменяет в ряду дни начиная с `since` на `tail` и сохраняет результат."""
+
+        merged = [value for value in series if self._day(value) < since]
+        kept = bool(merged)
+        merged.extend(tail)
+        if self.maxsize == 0:
+            return merged
+        with self._lock:
+            previous = self._data.get(key)
+            # Срок сохранённых дней отсчитывается от последнего полного чтения ряда.
+            read_at = previous[3] if kept and previous is not None else time.monotonic()
+            self._data[key] = (merged, watermark, open_from, read_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return merged
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "partial": self.partial,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+__all__ = ["IncrementalSeriesCache", "TieredWatermarkCache", "WatermarkLRUCache"]
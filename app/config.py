@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from datetime import date
 from functools import cache
 
 from pydantic import Field, field_validator
@@ -10,7 +11,42 @@ class Settings(BaseSettings):
     """Конфигурация приложения с валидацией переменных окружения."""
 
     db_dsn: str | None = Field(None, env="DB_DSN")
+    # DSN реплики для читающих запросов (не задан — всё читается из DB_DSN)
+    db_replica_dsn: str | None = Field(None, env="DB_REPLICA_DSN")
     allowed_origins: str = Field("*", env="ALLOWED_ORIGINS")
+    # Агрегация плана/факта за месяц в БД (GROUPING SETS) вместо выгрузки всех строк
+    plan_fact_rollup: bool = Field(True, env="PLAN_FACT_ROLLUP")
+    # Размер пачки серверного курсора для строк месяца (0 — читать всё сразу)
+    db_stream_batch_size: int = Field(0, env="DB_STREAM_BATCH_SIZE")
+    # Сколько месяцев держать в кеше дашборда (0 — кеш выключен)
+    dashboard_cache_size: int = Field(24, env="DASHBOARD_CACHE_SIZE")
+    # Период фонового опроса водяного знака загрузки (0 — читать на каждый запрос)
+    watermark_poll_interval_sec: float = Field(30.0, env="WATERMARK_POLL_INTERVAL_SEC")
+
+    # Сколько месяцев подневных расшифровок работ держать в памяти (0 — запрос на каждую работу)
+    work_breakdown_cache_months: int = Field(3, env="WORK_BREAKDOWN_CACHE_MONTHS")
+    # Сколько дней детализации (/dashboard/daily) держать в кеше (0 — кеш выключен)
+    daily_report_cache_size: int = Field(62, env="DAILY_REPORT_CACHE_SIZE")
+    # Сколько кешировать детализацию за последние DAILY_REVENUE_REOPEN_DAYS дней (данные ещё догружаются)
+    daily_report_today_ttl_sec: float = Field(60.0, env="DAILY_REPORT_TODAY_TTL_SEC")
+    # Сколько хранить агрегаты закрытых периодов (прошлых месяцев и дней) независимо от загрузок
+    closed_period_ttl_sec: float = Field(86400.0, env="CLOSED_PERIOD_TTL_SEC")
+    # Сколько последних дней факта может ещё измениться при загрузке: дневная выручка
+    # пересчитывается начиная с них, более ранние дни берутся из памяти
+    daily_revenue_reopen_days: int = Field(3, env="DAILY_REVENUE_REOPEN_DAYS")
+    # Начало периода контракта для накопительных итогов (/dashboard/period)
+    contract_period_start: date = Field(date(2025, 1, 1), env="CONTRACT_PERIOD_START")
+    # PREPARE читающих запросов один раз на соединение (выключить за pgbouncer в режиме transaction)
+    db_prepared_statements: bool = Field(True, env="DB_PREPARED_STATEMENTS")
+
+    # Бюджет времени на один запрос к API, с: остаток уходит в statement_timeout (0 — без дедлайна)
+    request_timeout_sec: float = Field(30.0, env="REQUEST_TIMEOUT_SEC")
+    # Верхняя граница statement_timeout для любых запросов, мс (0 — значение сервера)
+    db_statement_timeout_ms: int = Field(0, env="DB_STATEMENT_TIMEOUT_MS")
+    # Порог журнала медленных запросов, мс (0 — журнал выключен)
+    slow_query_threshold_ms: float = Field(0.0, env="SLOW_QUERY_THRESHOLD_MS")
+    # Сколько последних медленных запросов хранить для /health/slow-queries
+    slow_query_log_size: int = Field(200, env="SLOW_QUERY_LOG_SIZE")
 
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=False)
 
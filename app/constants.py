@@ -10,6 +10,7 @@ from __future__ import annotations
 API_PREFIX = "/api"
 DASHBOARD_BASE_PATH = f"{API_PREFIX}/dashboard"
 HEALTH_PATH = "/health"
+METRICS_PATH = "/metrics"
 
 # Отображение значений
 EMPTY_DISPLAY_VALUE = "–"
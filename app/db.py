@@ -1,15 +1,30 @@
 from __future__ import annotations
 
-from contextlib import AbstractContextManager, contextmanager
+from contextlib import (
+    AbstractAsyncContextManager,
+    AbstractContextManager,
+    asynccontextmanager,
+    contextmanager,
+)
+import asyncio
+import hashlib
 import logging
+import math
+import re
+import time
 from threading import Lock
-from typing import Iterator, Protocol
+from typing import Any, AsyncIterator, Iterator, Protocol
+from weakref import WeakKeyDictionary
 
-from psycopg2 import OperationalError, connect
+import aiopg
+from psycopg2 import DatabaseError, OperationalError, connect, errors
 from psycopg2.extensions import connection as PGConnection
 from psycopg2.pool import ThreadedConnectionPool
 
 from .config import get_settings
+from .deadline import DeadlineExceeded, remaining as deadline_remaining
+from .metrics import observe_query
+from .slowlog import reset_pool_wait, set_pool_wait, slow_queries
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +37,14 @@ class _ConnectionProvider(Protocol):
         """Закрывает ресурсы провайдера."""
 
 
+class _AsyncConnectionProvider(Protocol):
+    def connection(self) -> AbstractAsyncContextManager[aiopg.Connection]:
+        """Возвращает асинхронный контекстный менеджер с подключением."""
+
+    async def close(self) -> None:
+        """Закрывает ресурсы провайдера."""
+
+
 class _ThreadSafeConnectionPool:
     """Обёртка над ThreadedConnectionPool с безопасным контекстом."""
 
@@ -114,8 +137,391 @@ class _DirectConnectionProvider:
         return None
 
 
+class _AsyncConnectionPool:
+    """Асинхронный пул на aiopg (поверх psycopg2 в неблокирующем режиме).
+
+    Соединения aiopg всегда работают в autocommit, поэтому явный rollback
+    перед выдачей не нужен; проверка живости — `SELECT 1` как и в синхронном пуле.
+    """
+
+    def __init__(self, pool: aiopg.Pool) -> None:
+        self._pool = pool
+
+    @classmethod
+    async def create(cls, conninfo: str, *, min_size: int = 1, max_size: int = 10) -> "_AsyncConnectionPool":
+        pool = await aiopg.create_pool(conninfo, minsize=min_size, maxsize=max_size)
+        return cls(pool)
+
+    async def _get_valid_connection(self) -> aiopg.Connection:
+        conn = await self._pool.acquire()
+        try:
+            await self._ensure_connection_alive(conn)
+        except asyncio.CancelledError:
+            await self._discard(conn)
+            raise
+        except Exception as exc:
+            logger.error(
+                "Ошибка при проверке асинхронного соединения с БД, закрываю: %s",
+                exc,
+                exc_info=True,
+            )
+            await self._discard(conn)
+
+            logger.info("Пробую получить новое асинхронное соединение после ошибки проверки.")
+            conn = await self._pool.acquire()
+            try:
+                await self._ensure_connection_alive(conn)
+            except (Exception, asyncio.CancelledError):
+                await self._discard(conn)
+                raise
+        return conn
+
+    @staticmethod
+    async def _ensure_connection_alive(conn: aiopg.Connection) -> None:
+        if conn.closed:
+            msg = "Соединение с базой данных закрыто"
+            raise OperationalError(msg)
+
+        async with conn.cursor() as cur:
+            await cur.execute("SELECT 1")
+
+    async def _discard(self, conn: aiopg.Connection) -> None:
+        conn.close()
+        await self._pool.release(conn)
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiopg.Connection]:
+        conn = await self._get_valid_connection()
+        try:
+            yield conn
+        except (Exception, asyncio.CancelledError) as exc:
+            # В том числе отмена задачи: запрос мог остаться незавершённым,
+            # а без возврата соединения слот пула был бы потерян навсегда.
+            logger.warning(
+                "Ошибка при использовании асинхронного соединения, закрываю соединение: %r",
+                exc,
+                exc_info=False,
+            )
+            await self._discard(conn)
+            raise
+        else:
+            await self._pool.release(conn)
+
+    async def close(self) -> None:
+        self._pool.close()
+        await self._pool.wait_closed()
+
+
+class _DirectAsyncConnectionProvider:
+    """Запасной асинхронный вариант без пула."""
+
+    def __init__(self, conninfo: str) -> None:
+        self._conninfo = conninfo
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiopg.Connection]:
+        conn = await aiopg.connect(self._conninfo)
+        try:
+            yield conn
+        finally:
+            await conn.close()
+
+    async def close(self) -> None:  # pragma: no cover - нечего закрывать
+        return None
+
+
+_PLACEHOLDER_RE = re.compile(r"%%|%s")
+# Ошибки PREPARE, которые зависят только от текста SQL: такой текст не готовится никогда.
+_UNPREPARABLE_ERRORS = (errors.IndeterminateDatatype, errors.AmbiguousParameter, errors.SyntaxError)
+
+
+class PreparedStatementRegistry:
+    """Реестр подготовленных выражений (PREPARE / EXECUTE) по физическим соединениям.
+
+    Имя выражения — хеш текста SQL, поэтому оно одинаково на всех соединениях.
+    Для каждого соединения (ключ — сам объект, слабая ссылка) хранится набор
+    уже подготовленных имён: соединение, заменённое пулом, просто начинает
+    с пустого набора и готовит выражения заново при первом использовании.
+    Если PREPARE не удался из-за самого текста (например, тип параметра
+    не выводится), текст помечается неподготавливаемым и дальше выполняется
+    обычным `execute`; прочие ошибки (скажем, таблица пересоздаётся миграцией)
+    переводят на обычный `execute` только текущий вызов.
+
+    Выражения готовятся внутри текущей транзакции; при ошибке подготовки
+    синхронное соединение откатывается, поэтому реестр предназначен только
+    для читающих запросов.
+    """
+
+    def __init__(self) -> None:
+        self._statements: dict[str, tuple[str, str, int] | None] = {}
+        self._prepared: WeakKeyDictionary[Any, set[str]] = WeakKeyDictionary()
+        self._lock = Lock()
+        self.prepares = 0
+        self.executions = 0
+        self.reuses = 0
+        self.fallbacks = 0
+
+    def _statement(self, sql: str) -> tuple[str, str, int] | None:
+        """(имя, текст PREPARE, число параметров) или None для неподготавливаемого SQL."""
+
+        with self._lock:
+            if sql in self._statements:
+                return self._statements[sql]
+
+        statement: tuple[str, str, int] | None = None
+        if "%(" not in sql:
+            count = 0
+
+            def _placeholder(match: re.Match[str]) -> str:
+                nonlocal count
+                if match.group(0) == "%%":
+                    return "%"
+                count += 1
+                return f"${count}"
+
+            body = _PLACEHOLDER_RE.sub(_placeholder, sql.strip().rstrip(";"))
+            name = "mad_" + hashlib.sha1(sql.encode("utf-8")).hexdigest()[:16]
+            statement = (name, f"PREPARE {name} AS {body}", count)
+
+        with self._lock:
+            return self._statements.setdefault(sql, statement)
+
+    def _mark_unpreparable(self, sql: str, exc: Exception) -> None:
+        if not isinstance(exc, _UNPREPARABLE_ERRORS):
+            logger.warning("Не удалось подготовить выражение, этот вызов без PREPARE: %s", exc)
+            return
+        logger.warning("Выражение не подготавливается, дальше выполняю без PREPARE: %s", exc)
+        with self._lock:
+            self._statements[sql] = None
+
+    def _is_prepared(self, conn: Any, name: str) -> bool:
+        with self._lock:
+            prepared = self._prepared.setdefault(conn, set())
+            if name in prepared:
+                self.executions += 1
+                self.reuses += 1
+                return True
+            return False
+
+    def _remember(self, conn: Any, name: str) -> None:
+        with self._lock:
+            self._prepared.setdefault(conn, set()).add(name)
+            self.prepares += 1
+            self.executions += 1
+
+    def _forget(self, conn: Any) -> None:
+        with self._lock:
+            self._prepared.pop(conn, None)
+
+    @staticmethod
+    def _execute_sql(name: str, count: int) -> str:
+        if not count:
+            return f"EXECUTE {name}"
+        return f"EXECUTE {name} (" + ", ".join(["%s"] * count) + ")"
+
+    def _fallback(self) -> None:
+        with self._lock:
+            self.fallbacks += 1
+
+    def _prepare(self, cur, sql: str, statement: tuple[str, str, int]) -> bool:
+        name, prepare_sql, _ = statement
+        conn = cur.connection
+        if self._is_prepared(conn, name):
+            return True
+        try:
+            cur.execute(prepare_sql)
+        except DatabaseError as exc:
+            if isinstance(exc, OperationalError) or conn.closed:
+                raise
+            if not conn.autocommit:
+                conn.rollback()
+            self._mark_unpreparable(sql, exc)
+            return False
+        self._remember(conn, name)
+        return True
+
+    async def _prepare_async(self, cur, sql: str, statement: tuple[str, str, int]) -> bool:
+        name, prepare_sql, _ = statement
+        conn = cur.connection
+        if self._is_prepared(conn, name):
+            return True
+        try:
+            await cur.execute(prepare_sql)
+        except DatabaseError as exc:
+            if isinstance(exc, OperationalError) or conn.closed:
+                raise
+            self._mark_unpreparable(sql, exc)
+            return False
+        self._remember(conn, name)
+        return True
+
+    def execute(self, cur, sql: str, params: tuple[Any, ...] | None = None, *, _retry: bool = True) -> None:
+        """Выполняет `sql` на курсоре psycopg2 через подготовленное выражение."""
+
+        statement = self._statement(sql)
+        if statement is None or not self._prepare(cur, sql, statement):
+            self._fallback()
+            cur.execute(sql, params or ())
+            return
+
+        name, _, count = statement
+        try:
+            cur.execute(self._execute_sql(name, count), params or ())
+        except errors.InvalidSqlStatementName:
+            # Выражение пропало на сервере (DISCARD ALL, пулер) — готовим заново.
+            if not _retry:
+                raise
+            conn = cur.connection
+            self._forget(conn)
+            if not conn.autocommit:
+                conn.rollback()
+            self.execute(cur, sql, params, _retry=False)
+
+    async def execute_async(
+        self, cur, sql: str, params: tuple[Any, ...] | None = None, *, _retry: bool = True
+    ) -> None:
+        """Асинхронный вариант `execute` для курсора aiopg (всегда autocommit)."""
+
+        statement = self._statement(sql)
+        if statement is None or not await self._prepare_async(cur, sql, statement):
+            self._fallback()
+            await cur.execute(sql, params or ())
+            return
+
+        name, _, count = statement
+        try:
+            await cur.execute(self._execute_sql(name, count), params or ())
+        except errors.InvalidSqlStatementName:
+            if not _retry:
+                raise
+            self._forget(cur.connection)
+            await self.execute_async(cur, sql, params, _retry=False)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "statements": sum(1 for statement in self._statements.values() if statement is not None),
+                "unpreparable": sum(1 for statement in self._statements.values() if statement is None),
+                "connections": len(self._prepared),
+                "prepares": self.prepares,
+                "executions": self.executions,
+                "reuses": self.reuses,
+                "fallbacks": self.fallbacks,
+                "reuse_ratio": self.reuses / self.executions if self.executions else None,
+            }
+
+
+prepared_statements = PreparedStatementRegistry()
+
+
+def _observe(sql: str, params: tuple[Any, ...] | None, duration_sec: float, rows: int) -> None:
+    observe_query(sql, duration_sec, rows)
+    slow_queries.observe(sql, params, duration_sec, rows)
+
+
+def execute_prepared(cur, sql: str, params: tuple[Any, ...] | None = None) -> None:
+    """Выполняет читающий запрос через PREPARE/EXECUTE (если включено `DB_PREPARED_STATEMENTS`).
+
+    Длительность и число строк записываются в метрики (см. `metrics.py`),
+    медленные запросы — в журнал (см. `slowlog.py`).
+    """
+
+    started = time.perf_counter()
+    try:
+        if get_settings().db_prepared_statements:
+            prepared_statements.execute(cur, sql, params)
+        else:
+            cur.execute(sql, params or ())
+    finally:
+        _observe(sql, params, time.perf_counter() - started, cur.rowcount)
+
+
+async def execute_prepared_async(cur, sql: str, params: tuple[Any, ...] | None = None) -> None:
+    """Асинхронный вариант `execute_prepared` для курсора aiopg."""
+
+    started = time.perf_counter()
+    try:
+        if get_settings().db_prepared_statements:
+            await prepared_statements.execute_async(cur, sql, params)
+        else:
+            await cur.execute(sql, params or ())
+    finally:
+        _observe(sql, params, time.perf_counter() - started, cur.rowcount)
+
+
+# Применённый к соединению statement_timeout, мс (нет ключа — значение сервера).
+_statement_timeouts: WeakKeyDictionary[Any, int] = WeakKeyDictionary()
+
+
+def _statement_timeout_ms() -> int | None:
+    """statement_timeout для следующих запросов: остаток дедлайна, не больше DB_STATEMENT_TIMEOUT_MS.
+
+    Остаток округляется вверх до целых секунд: иначе значение менялось бы при
+    каждой выдаче соединения и каждый запрос платил бы за лишние SET и COMMIT.
+    """
+
+    cap = get_settings().db_statement_timeout_ms
+    left = deadline_remaining()
+    if left is None:
+        return cap if cap > 0 else None
+    if left <= 0:
+        raise DeadlineExceeded("Бюджет времени запроса исчерпан до обращения к БД")
+    timeout_ms = math.ceil(left) * 1000
+    return min(timeout_ms, cap) if cap > 0 else timeout_ms
+
+
+def _statement_timeout_sql(conn: Any) -> str | None:
+    """SET для соединения или None, если нужное значение уже установлено."""
+
+    timeout_ms = _statement_timeout_ms()
+    if timeout_ms == _statement_timeouts.get(conn):
+        return None
+    if timeout_ms is None:
+        del _statement_timeouts[conn]
+        return "SET statement_timeout = DEFAULT"
+    _statement_timeouts[conn] = timeout_ms
+    return f"SET statement_timeout = {timeout_ms}"
+
+
+def _apply_statement_timeout(conn: PGConnection) -> None:
+    sql = _statement_timeout_sql(conn)
+    if sql is None:
+        return
+    try:
+        with conn.cursor() as cur:
+            cur.execute(sql)
+        # Фиксируем, чтобы rollback после ошибки запроса не вернул прежнее значение.
+        conn.commit()
+    except Exception:
+        _statement_timeouts.pop(conn, None)
+        raise
+
+
+async def _apply_statement_timeout_async(conn: aiopg.Connection) -> None:
+    sql = _statement_timeout_sql(conn)
+    if sql is None:
+        return
+    try:
+        async with conn.cursor() as cur:
+            await cur.execute(sql)
+    except Exception:
+        _statement_timeouts.pop(conn, None)
+        raise
+
+
 _pool: _ConnectionProvider | None = None
 _pool_lock = Lock()
+_async_pool: _AsyncConnectionProvider | None = None
+_async_pool_lock = asyncio.Lock()
+
+# Пулы реплики для читающих запросов (DB_REPLICA_DSN).
+_replica_pool: _ConnectionProvider | None = None
+_replica_pool_lock = Lock()
+_replica_async_pool: _AsyncConnectionProvider | None = None
+_replica_async_pool_lock = asyncio.Lock()
+# Реплика догнала водяной знак загрузки основной БД (см. `queries.fetch_last_updated`);
+# до первой проверки чтение идёт в основную БД.
+_replica_in_sync = False
 
 
 def _create_pool(dsn: str) -> _ConnectionProvider:
@@ -130,19 +536,31 @@ def _create_pool(dsn: str) -> _ConnectionProvider:
         return _DirectConnectionProvider(conninfo=dsn)
 
 
+def _get_dsn() -> str:
+    dsn = get_settings().db_dsn
+    if not dsn:
+        msg = (
+            "Переменная окружения DB_DSN не задана. "
+            "Невозможно установить соединение с базой данных."
+        )
+        raise RuntimeError(msg)
+    return dsn
+
+
+def _get_replica_dsn() -> str:
+    dsn = get_settings().db_replica_dsn
+    if not dsn:
+        msg = "Переменная окружения DB_REPLICA_DSN не задана."
+        raise RuntimeError(msg)
+    return dsn
+
+
 def _get_pool() -> _ConnectionProvider:
     global _pool
     if _pool is None:
         with _pool_lock:
             if _pool is None:
-                dsn = get_settings().db_dsn
-                if not dsn:
-                    msg = (
-                        "Переменная окружения DB_DSN не задана. "
-                        "Невозможно установить соединение с базой данных."
-                    )
-                    raise RuntimeError(msg)
-
+                dsn = _get_dsn()
                 logger.info(
                     "Инициализация пула соединений с БД (с параметром sslmode)"
                 )
@@ -150,17 +568,179 @@ def _get_pool() -> _ConnectionProvider:
     return _pool
 
 
+def _get_replica_pool() -> _ConnectionProvider:
+    global _replica_pool
+    if _replica_pool is None:
+        with _replica_pool_lock:
+            if _replica_pool is None:
+                dsn = _get_replica_dsn()
+                logger.info("Инициализация пула соединений с репликой БД")
+                # Без отката на прямые подключения (`_create_pool`): неудачный пул не
+                # кешируется, и следующая проверка водяного знака создаст его заново.
+                try:
+                    _replica_pool = _ThreadSafeConnectionPool(conninfo=dsn)
+                except Exception as exc:
+                    logger.error("Не удалось создать пул соединений с репликой БД: %s", exc)
+                    raise
+    return _replica_pool
+
+
+def replica_configured() -> bool:
+    return bool(get_settings().db_replica_dsn)
+
+
+def set_replica_in_sync(in_sync: bool) -> None:
+    """Разрешает (или запрещает) читать с реплики по результату сверки водяных знаков."""
+
+    global _replica_in_sync
+    if in_sync != _replica_in_sync:
+        if in_sync:
+            logger.info("Реплика догнала водяной знак загрузки, чтение идёт с реплики")
+        else:
+            logger.warning("Реплика отстаёт от основной БД, чтение временно идёт в основную БД")
+    _replica_in_sync = in_sync
+
+
+def _reads_from_replica() -> bool:
+    return _replica_in_sync and replica_configured()
+
+
+def replica_status() -> dict[str, bool]:
+    return {"configured": replica_configured(), "in_sync": _reads_from_replica()}
+
+
+@contextmanager
+def _pooled_connection(pool: _ConnectionProvider) -> Iterator[PGConnection]:
+    started = time.perf_counter()
+    with pool.connection() as conn:
+        token = set_pool_wait(time.perf_counter() - started)
+        try:
+            _apply_statement_timeout(conn)
+            yield conn
+        finally:
+            reset_pool_wait(token)
+
+
 @contextmanager
 def get_connection() -> Iterator[PGConnection]:
-    """Получение соединения из пула с автоматическим возвратом."""
+    """Получение соединения из пула основной БД с автоматическим возвратом.
 
-    pool = _get_pool()
-    with pool.connection() as conn:
+    statement_timeout соединения ограничивается остатком дедлайна запроса
+    (см. `deadline.py`) и `DB_STATEMENT_TIMEOUT_MS`. Записи и DDL идут только сюда.
+    """
+
+    with _pooled_connection(_get_pool()) as conn:
+        yield conn
+
+
+@contextmanager
+def get_read_connection() -> Iterator[PGConnection]:
+    """Соединение для читающих запросов: реплика, если она задана и не отстаёт, иначе основная БД."""
+
+    pool = _get_replica_pool() if _reads_from_replica() else _get_pool()
+    with _pooled_connection(pool) as conn:
+        yield conn
+
+
+@contextmanager
+def get_replica_connection() -> Iterator[PGConnection]:
+    """Соединение именно с репликой (для сверки её водяного знака)."""
+
+    with _pooled_connection(_get_replica_pool()) as conn:
         yield conn
 
 
 def close_pool() -> None:
-    global _pool
+    global _pool, _replica_pool
     if _pool is not None:
         _pool.close()
         _pool = None
+    if _replica_pool is not None:
+        _replica_pool.close()
+        _replica_pool = None
+
+
+async def _create_async_pool(dsn: str) -> _AsyncConnectionProvider:
+    try:
+        return await _AsyncConnectionPool.create(dsn)
+    except Exception as exc:  # pragma: no cover - защита от неожиданных ошибок
+        logger.error(
+            "Не удалось создать асинхронный пул aiopg: %s. Переключаюсь на прямые подключения.",
+            exc,
+            exc_info=True,
+        )
+        return _DirectAsyncConnectionProvider(conninfo=dsn)
+
+
+async def _get_async_pool() -> _AsyncConnectionProvider:
+    global _async_pool
+    if _async_pool is None:
+        async with _async_pool_lock:
+            if _async_pool is None:
+                dsn = _get_dsn()
+                logger.info("Инициализация асинхронного пула соединений с БД")
+                _async_pool = await _create_async_pool(dsn)
+    return _async_pool
+
+
+async def _get_replica_async_pool() -> _AsyncConnectionProvider:
+    global _replica_async_pool
+    if _replica_async_pool is None:
+        async with _replica_async_pool_lock:
+            if _replica_async_pool is None:
+                dsn = _get_replica_dsn()
+                logger.info("Инициализация асинхронного пула соединений с репликой БД")
+                try:
+                    _replica_async_pool = await _AsyncConnectionPool.create(dsn)
+                except Exception as exc:
+                    logger.error("Не удалось создать асинхронный пул соединений с репликой БД: %s", exc)
+                    raise
+    return _replica_async_pool
+
+
+@asynccontextmanager
+async def _pooled_async_connection(pool: _AsyncConnectionProvider) -> AsyncIterator[aiopg.Connection]:
+    started = time.perf_counter()
+    async with pool.connection() as conn:
+        token = set_pool_wait(time.perf_counter() - started)
+        try:
+            await _apply_statement_timeout_async(conn)
+            yield conn
+        except asyncio.CancelledError:
+            # aiopg превращает отмену запроса сервером (statement_timeout) в CancelledError —
+            # в любом запросе на этом соединении, не только в `execute_prepared_async`.
+            # Отмену самой задачи пропускаем как есть, а таймаут возвращаем как ошибку БД,
+            # чтобы ответ стал 504, а не оборванным запросом.
+            task = asyncio.current_task()
+            if task is None or task.cancelling():
+                raise
+            raise errors.QueryCanceled("canceling statement due to statement timeout") from None
+        finally:
+            reset_pool_wait(token)
+
+
+@asynccontextmanager
+async def get_async_connection() -> AsyncIterator[aiopg.Connection]:
+    """Асинхронное получение соединения из пула основной БД с автоматическим возвратом."""
+
+    async with _pooled_async_connection(await _get_async_pool()) as conn:
+        yield conn
+
+
+@asynccontextmanager
+async def get_async_read_connection() -> AsyncIterator[aiopg.Connection]:
+    """Асинхронный вариант `get_read_connection()`."""
+
+    pool = await (_get_replica_async_pool() if _reads_from_replica() else _get_async_pool())
+    async with _pooled_async_connection(pool) as conn:
+        yield conn
+
+
+async def close_async_pool() -> None:
+    global _async_pool, _replica_async_pool
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
+    if _replica_async_pool is not None:
+        await _replica_async_pool.close()
+        _replica_async_pool = None
@@ -0,0 +1,48 @@
+"""Дедлайн обработки запроса к API.
+
+Эндпоинты дашборда выполняются внутри `deadline_scope(REQUEST_TIMEOUT_SEC)`.
+Остаток бюджета уходит в `statement_timeout` соединения (`db.get_connection()`),
+а `db_retry` не повторяет операцию, если на повтор времени не осталось —
+долгий запрос отменяется сервером, а не держит соединение и поток.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Бюджет времени запроса исчерпан до обращения к БД."""
+
+
+@contextmanager
+def deadline_scope(timeout_sec: float) -> Iterator[None]:
+    """Ограничивает код внутри блока `timeout_sec` секундами (<= 0 — без дедлайна).
+
+    Вложенный блок не может продлить внешний дедлайн.
+    """
+
+    deadline = time.monotonic() + timeout_sec if timeout_sec > 0 else None
+    outer = _deadline.get()
+    if outer is not None and (deadline is None or outer < deadline):
+        deadline = outer
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """Сколько секунд осталось до дедлайна (None — дедлайна нет)."""
+
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+__all__ = ["DeadlineExceeded", "deadline_scope", "remaining"]
@@ -0,0 +1,264 @@
+"""Колоночные представления данных за месяц.
+
+`MonthFrame` — строки `skpdi_plan_vs_fact_monthly`. Вместо словаря на каждую
+работу строки пачки кодируются в массивы: категория сметы — малое целое,
+работа (описание + категория) — индекс в таблице интернированных ключей,
+суммы — float64. Итоги по категориям и по работам считаются векторно
+(`numpy.bincount`), поэтому между пачками в памяти живут только массивы
+сумм по работам.
+
+`MonthWorkBreakdown` — подневные объёмы и суммы всех работ месяца из
+`skpdi_fact_with_money` для мгновенной расшифровки любой работы.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from datetime import date
+from threading import Lock
+from typing import Any, Callable, Iterable, Iterator, Mapping, Sequence
+
+import numpy as np
+
+from .constants import CATEGORY_SUMMER, CATEGORY_VNR_CODES, CATEGORY_VNR_LABEL, CATEGORY_WINTER
+from .utils import normalize_string, to_date, to_float
+
+# Код категории — индекс в CATEGORIES.
+CATEGORIES = (CATEGORY_SUMMER, CATEGORY_WINTER, CATEGORY_VNR_LABEL)
+_VNR_CODE = 2
+_CATEGORY_CODES = {
+    CATEGORY_SUMMER: 0,
+    CATEGORY_WINTER: 1,
+    **{code: _VNR_CODE for code in CATEGORY_VNR_CODES},
+}
+# Строки внерегламента не относятся ни к одной работе: их индекс работы — 0.
+_NO_WORK = 0
+
+
+def _amount(value: Any) -> Any:
+    return 0.0 if value is None else value
+
+
+class MonthFrame:
+    """Суммы плана и факта по категориям и работам за месяц.
+
+    Пример использования:
+
+        frame = MonthFrame()
+        async for cols, chunk in _iter_rows_async(ITEMS_SQL, (month_start,), batch_size=...):
+            frame.add_rows(chunk, cols)
+        planned, fact = frame.category_totals()
+    """
+
+    __slots__ = (
+        "work_keys",
+        "work_meta",
+        "_work_index",
+        "work_planned",
+        "work_fact",
+        "category_planned",
+        "category_fact",
+    )
+
+    def __init__(self) -> None:
+        # (description, категория) и (month_start, smeta_code) по индексу работы;
+        # индекс 0 зарезервирован за строками внерегламента.
+        self.work_keys: list[tuple[Any, str]] = [(None, CATEGORY_VNR_LABEL)]
+        self.work_meta: list[tuple[date | None, Any]] = [(None, None)]
+        self._work_index: dict[tuple[Any, str], int] = {}
+        self.work_planned = np.zeros(1)
+        self.work_fact = np.zeros(1)
+        self.category_planned = np.zeros(len(CATEGORIES))
+        self.category_fact = np.zeros(len(CATEGORIES))
+
+    def __len__(self) -> int:
+        return len(self.work_keys) - 1
+
+    def add_rows(self, rows: Iterable[Sequence[Any]], cols: Mapping[str, Any]) -> None:
+        """Кодирует пачку строк `ITEMS_SQL` и добавляет её суммы."""
+
+        i_smeta = cols["smeta_code"]
+        i_description = cols["description"]
+        i_month = cols["month_start"]
+        i_planned = cols["planned_amount"]
+        i_fact = cols["fact_amount_done"]
+        work_index, work_keys, work_meta = self._work_index, self.work_keys, self.work_meta
+
+        codes: list[int] = []
+        works: list[int] = []
+        planned: list[Any] = []
+        fact: list[Any] = []
+        for row in rows:
+            smeta_code = row[i_smeta]
+            category = normalize_string(smeta_code, "")
+            code = _CATEGORY_CODES.get(category)
+            if code is None:
+                continue
+            if code == _VNR_CODE:
+                # Для внерегламента учитывается только факт.
+                work = _NO_WORK
+                planned.append(0.0)
+            else:
+                key = (row[i_description], category)
+                work = work_index.get(key)
+                if work is None:
+                    work = work_index[key] = len(work_keys)
+                    work_keys.append(key)
+                    work_meta.append((to_date(row[i_month]), smeta_code))
+                planned.append(_amount(row[i_planned]))
+            codes.append(code)
+            works.append(work)
+            fact.append(_amount(row[i_fact]))
+
+        count = len(codes)
+        if not count:
+            return
+
+        code_arr = np.fromiter(codes, dtype=np.int8, count=count)
+        work_arr = np.fromiter(works, dtype=np.int64, count=count)
+        planned_arr = np.fromiter(planned, dtype=np.float64, count=count)
+        fact_arr = np.fromiter(fact, dtype=np.float64, count=count)
+
+        size = len(CATEGORIES)
+        self.category_planned += np.bincount(code_arr, weights=planned_arr, minlength=size)
+        self.category_fact += np.bincount(code_arr, weights=fact_arr, minlength=size)
+
+        size = len(work_keys)
+        if len(self.work_planned) < size:
+            grow = size - len(self.work_planned)
+            self.work_planned = np.concatenate((self.work_planned, np.zeros(grow)))
+            self.work_fact = np.concatenate((self.work_fact, np.zeros(grow)))
+        self.work_planned += np.bincount(work_arr, weights=planned_arr, minlength=size)
+        self.work_fact += np.bincount(work_arr, weights=fact_arr, minlength=size)
+
+    def category_totals(self) -> tuple[dict[str, float], dict[str, float]]:
+        """(план, факт) по кодам CATEGORIES; план внерегламента всегда 0."""
+
+        return (
+            dict(zip(CATEGORIES, self.category_planned.tolist())),
+            dict(zip(CATEGORIES, self.category_fact.tolist())),
+        )
+
+    def works(self, threshold: float | None = None) -> Iterator[tuple[tuple[Any, str], tuple[date | None, Any], float, float]]:
+        """Работы в порядке первого появления: (ключ, метаданные, план, факт).
+
+        При `threshold` остаются работы, у которых план или факт больше порога
+        (маска считается векторно).
+        """
+
+        indices = np.arange(1, len(self.work_keys))
+        if threshold is not None:
+            planned, fact = self.work_planned[1:], self.work_fact[1:]
+            indices = indices[(planned > threshold) | (fact > threshold)]
+        planned_values = self.work_planned[indices].tolist()
+        fact_values = self.work_fact[indices].tolist()
+        for index, planned, fact in zip(indices.tolist(), planned_values, fact_values):
+            yield self.work_keys[index], self.work_meta[index], planned, fact
+
+
+class MonthWorkBreakdown:
+    """Подневные объёмы всех работ месяца: строки (описание, день) в массивах.
+
+    Описания и единицы измерения интернированы в списки, в массивах хранятся
+    их индексы, день месяца, объём и сумма. Ряд для работы собирается векторно
+    по маске подходящих описаний; последние `SERIES_MEMO_SIZE` рядов запоминаются
+    (ключ — строка из запроса, поэтому память ограничена).
+
+    Пример использования:
+
+        breakdown = MonthWorkBreakdown(month_start, rows, cols)
+        series = breakdown.series(work, matcher)  # [(date, объём, единица, сумма), ...]
+    """
+
+    __slots__ = (
+        "month_start",
+        "descriptions",
+        "units",
+        "description_idx",
+        "unit_idx",
+        "day",
+        "volume",
+        "amount",
+        "_series",
+        "_series_lock",
+    )
+
+    SERIES_MEMO_SIZE = 64
+
+    def __init__(self, month_start: date, rows: Iterable[Sequence[Any]], cols: Mapping[str, Any]) -> None:
+        i_description, i_date = cols["description"], cols["work_date"]
+        i_volume, i_unit, i_amount = cols["total_volume"], cols["unit"], cols["total_amount"]
+
+        self.month_start = month_start
+        self.descriptions: list[str] = []
+        self.units: list[str] = []
+        description_index: dict[str, int] = {}
+        unit_index: dict[str, int] = {}
+        descriptions: list[int] = []
+        units: list[int] = []
+        days: list[int] = []
+        volumes: list[float] = []
+        amounts: list[float] = []
+        for row in rows:
+            work_date = to_date(row[i_date])
+            if work_date is None:
+                continue
+            description = row[i_description] or ""
+            index = description_index.get(description)
+            if index is None:
+                index = description_index[description] = len(self.descriptions)
+                self.descriptions.append(description)
+            unit = normalize_string(row[i_unit])
+            unit_position = unit_index.get(unit)
+            if unit_position is None:
+                unit_position = unit_index[unit] = len(self.units)
+                self.units.append(unit)
+            descriptions.append(index)
+            units.append(unit_position)
+            days.append(work_date.day)
+            volumes.append(to_float(row[i_volume]) or 0.0)
+            amounts.append(to_float(row[i_amount]) or 0.0)
+
+        self.description_idx = np.array(descriptions, dtype=np.int32)
+        self.unit_idx = np.array(units, dtype=np.int32)
+        self.day = np.array(days, dtype=np.int8)
+        self.volume = np.array(volumes, dtype=np.float64)
+        self.amount = np.array(amounts, dtype=np.float64)
+        self._series: OrderedDict[str, list[tuple[date, float, str, float]]] = OrderedDict()
+        self._series_lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self.day)
+
+    def series(self, key: str, match: Callable[[str], Any]) -> list[tuple[date, float, str, float]]:
+        """Ряд (дата, объём, единица, сумма) по описаниям, для которых `match` истинно."""
+
+        with self._series_lock:
+            cached = self._series.get(key)
+            if cached is not None:
+                self._series.move_to_end(key)
+                return cached
+
+        matched = [index for index, description in enumerate(self.descriptions) if match(description)]
+        result: list[tuple[date, float, str, float]] = []
+        if matched:
+            mask = np.isin(self.description_idx, matched)
+            days = self.day[mask]
+            volume_by_day = np.bincount(days, weights=self.volume[mask], minlength=32)
+            amount_by_day = np.bincount(days, weights=self.amount[mask], minlength=32)
+            # Как MAX(unit) в SQL: из нескольких описаний за день берём наибольшую единицу.
+            unit_by_day: dict[int, str] = {}
+            for day, unit in zip(days.tolist(), self.unit_idx[mask].tolist()):
+                unit_by_day[day] = max(unit_by_day.get(day, ""), self.units[unit])
+            result = [
+                (self.month_start.replace(day=day), float(volume_by_day[day]), unit_by_day[day], float(amount_by_day[day]))
+                for day in sorted(unit_by_day)
+            ]
+        with self._series_lock:
+            self._series[key] = result
+            while len(self._series) > self.SERIES_MEMO_SIZE:
+                self._series.popitem(last=False)
+        return result
+
+
+__all__ = ["CATEGORIES", "MonthFrame", "MonthWorkBreakdown"]
@@ -5,12 +5,17 @@ from pathlib import Path
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
+from psycopg2.errors import QueryCanceled
 
 from .config import settings
-from .constants import API_PREFIX, HEALTH_PATH
-from .db import close_pool
+from .constants import API_PREFIX, HEALTH_PATH, METRICS_PATH
+from .db import close_async_pool, close_pool, prepared_statements, replica_status
+from .deadline import DeadlineExceeded
+from .metrics import render_prometheus
+from .queries import cache_stats, watermark
+from .slowlog import slow_queries
 from .routers import dashboard
 
 NO_CACHE_HEADERS = {
@@ -28,8 +33,11 @@ def _apply_no_cache(response):
 async def lifespan(app: FastAPI):
     """Управление lifecycle приложения: инициализация и чистка ресурсов."""
     # Startup: подготовка при запуске приложения
+    watermark.start()
     yield
     # Shutdown: очистка при завершении приложения
+    await watermark.stop()
+    await close_async_pool()
     close_pool()
 
 
@@ -65,12 +73,44 @@ def create_app() -> FastAPI:
 
         return response
 
+    @app.exception_handler(DeadlineExceeded)
+    @app.exception_handler(QueryCanceled)
+    async def deadline_exceeded(request: Request, exc: Exception) -> JSONResponse:
+        # Дедлайн запроса истёк или БД отменила запрос по statement_timeout.
+        return JSONResponse(status_code=504, content={"detail": "Превышено время ожидания ответа БД"})
+
     app.include_router(dashboard.router, prefix=API_PREFIX)
 
     @app.get(HEALTH_PATH)
     def health() -> dict[str, str]:
         return {"status": "ok"}
 
+    @app.get(f"{HEALTH_PATH}/caches")
+    def health_caches() -> dict:
+        """Размеры и доля попаданий внутрипроцессных кешей (по уровням, где они есть)
+        и переиспользование подготовленных выражений (PREPARE)."""
+        return {"caches": cache_stats(), "prepared_statements": prepared_statements.stats()}
+
+    @app.get(f"{HEALTH_PATH}/replica")
+    def health_replica() -> dict[str, bool]:
+        """Задана ли реплика и читаются ли с неё запросы (не отстаёт ли по водяному знаку)."""
+        return replica_status()
+
+    @app.get(f"{HEALTH_PATH}/slow-queries")
+    def health_slow_queries() -> dict:
+        """Последние медленные запросы (журнал включается SLOW_QUERY_THRESHOLD_MS)."""
+        return {
+            "enabled": slow_queries.enabled,
+            "threshold_ms": slow_queries.threshold_ms,
+            "recorded": slow_queries.recorded,
+            "entries": slow_queries.entries(),
+        }
+
+    @app.get(METRICS_PATH, response_class=PlainTextResponse)
+    def metrics() -> PlainTextResponse:
+        """Гистограммы запросов к БД в текстовом формате Prometheus."""
+        return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
     return app
 
 
@@ -0,0 +1,136 @@
+"""Гистограммы длительности запросов к БД в текстовом формате Prometheus.
+
+Каждый запрос через `execute_prepared` попадает в гистограммы длительности
+и числа строк с метками:
+  * `label` — метка операции `db_retry` (имя выборки), в контексте которой
+    выполняется запрос (`unlabelled` вне её);
+  * `shape` — подпись цепочки `FactQueryBuilder` (`static` для готовых SQL).
+Число повторов `db_retry` на вызов пишется в отдельную гистограмму.
+
+Серверные курсоры (`DB_STREAM_BATCH_SIZE > 0`) не учитываются: время их
+чтения включает обработку пачек. Метрики отдаются на `/metrics`.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Iterator, Sequence
+
+from .query_builder import shape_of
+
+UNLABELLED = "unlabelled"
+STATIC_SHAPE = "static"
+
+_operation: ContextVar[str] = ContextVar("db_operation", default=UNLABELLED)
+
+
+class Histogram:
+    """Потокобезопасная гистограмма Prometheus с фиксированными границами и метками."""
+
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float], labelnames: Sequence[str]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = tuple(labelnames)
+        # метки -> (счётчики по границам без накопления, сумма, количество)
+        self._series: dict[tuple[str, ...], tuple[list[int], float, int]] = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total, count = self._series.get(labels) or ([0] * (len(self.buckets) + 1), 0.0, 0)
+            counts[index] += 1
+            self._series[labels] = (counts, total + value, count + 1)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, (list(counts), total, count)) for labels, (counts, total, count) in self._series.items())
+        for labels, (counts, total, count) in series:
+            base = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, bucket_count in zip((*map(_format, self.buckets), "+Inf"), counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{{{base + ',' if base else ''}{le}}} {cumulative}")
+            suffix = f"{{{base}}}" if base else ""
+            lines.append(f"{self.name}_sum{suffix} {_format(total)}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+def _format(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Время выполнения запроса к БД.",
+    (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    ("label", "shape"),
+)
+QUERY_ROWS = Histogram(
+    "db_query_rows",
+    "Число строк в результате запроса.",
+    (0, 1, 10, 100, 1_000, 10_000, 100_000, 1_000_000),
+    ("label", "shape"),
+)
+OPERATION_RETRIES = Histogram(
+    "db_operation_retries",
+    "Число повторов db_retry на один вызов операции.",
+    (0, 1, 2, 3, 5),
+    ("label",),
+)
+_HISTOGRAMS = (QUERY_DURATION, QUERY_ROWS, OPERATION_RETRIES)
+
+
+@contextmanager
+def operation_label(label: str) -> Iterator[None]:
+    """Помечает запросы внутри блока меткой операции (используется `db_retry`)."""
+
+    token = _operation.set(label)
+    try:
+        yield
+    finally:
+        _operation.reset(token)
+
+
+def current_operation() -> str:
+    return _operation.get()
+
+
+def observe_query(sql: str, duration_sec: float, rows: int | None) -> None:
+    """Записывает длительность и число строк запроса (rows < 0 или None — неизвестно)."""
+
+    labels = (_operation.get(), shape_of(sql) or STATIC_SHAPE)
+    QUERY_DURATION.observe(duration_sec, *labels)
+    if rows is not None and rows >= 0:
+        QUERY_ROWS.observe(rows, *labels)
+
+
+def observe_retries(label: str, retries: int) -> None:
+    OPERATION_RETRIES.observe(retries, label)
+
+
+def render_prometheus() -> str:
+    """Все гистограммы в текстовом формате экспозиции Prometheus 0.0.4."""
+
+    return "\n".join(line for histogram in _HISTOGRAMS for line in histogram.render()) + "\n"
+
+
+__all__ = [
+    "Histogram",
+    "current_operation",
+    "observe_query",
+    "observe_retries",
+    "operation_label",
+    "render_prometheus",
+]
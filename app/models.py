@@ -61,3 +61,39 @@ class DashboardResponse(BaseModel):
     summary: DashboardSummary | None
     items: list[DashboardItem]
     has_data: bool
+
+
+class SmetaCategory(BaseModel):
+    key: str
+    title: str
+    planned: float
+    fact: float
+    delta: float
+
+
+class DashboardRangeMonth(BaseModel):
+    month: date
+    summary: DashboardSummary
+    smeta_categories: list[SmetaCategory]
+    has_data: bool
+
+
+class DashboardRangeResponse(BaseModel):
+    month_from: date
+    month_to: date
+    last_updated: datetime | None
+    months: list[DashboardRangeMonth]
+    smeta_categories: list[SmetaCategory]
+    has_data: bool
+
+
+class DashboardPeriodResponse(BaseModel):
+    period_start: date
+    period_end: date
+    last_updated: datetime | None
+    months_with_data: int
+    planned_amount: float
+    fact_amount: float
+    delta_amount: float
+    completion_pct: float | None = None
+    smeta_categories: list[SmetaCategory]
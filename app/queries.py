@@ -2,32 +2,46 @@ from __future__ import annotations
 
 import logging
 import calendar
+import re
+from itertools import chain
 from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import Any, Callable, TypeVar, Iterable, Optional
+from typing import Any, AsyncIterator, Callable, Mapping, Sequence, TypeVar, Iterable
 
 from psycopg2 import InterfaceError, OperationalError
-from psycopg2.extras import RealDictCursor
 
 from .constants import (
     CATEGORY_SUMMER,
     CATEGORY_WINTER,
-    CATEGORY_SEASONAL,
-    CATEGORY_VNR_CODES,
+    CATEGORY_VNR_1,
+    CATEGORY_VNR_2,
     CATEGORY_VNR_LABEL,
+    MIN_VALUE_THRESHOLD,
     TABLE_CONTRACT_EXECUTED,
     TABLE_CONTRACT_TOTAL,
     TABLE_FACT_AGG,
     TABLE_PLAN_AGG,
     TABLE_PLAN_VS_FACT_MONTHLY,
     TABLE_RATES,
-    UNTITLED_WORK_LABEL,
 )
-from .db import get_connection
+from .cache import IncrementalSeriesCache, TieredWatermarkCache, WatermarkLRUCache
+from .config import get_settings
+from .frame import MonthFrame, MonthWorkBreakdown
+from .db import (
+    execute_prepared,
+    execute_prepared_async,
+    get_async_read_connection,
+    get_connection,
+    get_read_connection,
+    get_replica_connection,
+    replica_configured,
+    set_replica_in_sync,
+)
+from .metrics import operation_label
 from .retry import db_retry
+from .singleflight import AsyncSingleFlight, single_flight
+from .watermark import WatermarkPoller
 from .models import (
-    DashboardItem,
-    DashboardSummary,
     DailyReportItem,
     DailyReportResponse,
     DailyRevenue,
@@ -35,18 +49,16 @@ from .models import (
 )
 from .query_builder import FactQueryBuilder
 from .utils import (
+    to_date,
     to_float,
     normalize_string,
     get_month_start,
     get_next_month_start,
-    extract_dict_strings,
 )
 
 logger = logging.getLogger(__name__)
 
 
-_PLAN_BASE_CATEGORIES = CATEGORY_SEASONAL
-_VNR_CATEGORY_CODES = CATEGORY_VNR_CODES
 _VNR_PLAN_SHARE = Decimal("0.43")
 
 _DB_RETRYABLE_ERRORS = (OperationalError, InterfaceError)
@@ -55,6 +67,65 @@ _DB_RETRY_BACKOFF = 1.0  # Можно увеличить (>1.0) для эксп
 
 T = TypeVar("T")
 
+_ITEMS_CURSOR_NAME = "plan_vs_fact_items"
+
+# Кеш полного ответа fetch_plan_vs_fact_for_month_async по месяцу.
+_month_cache: WatermarkLRUCache[tuple[date, date], tuple] = WatermarkLRUCache(
+    get_settings().dashboard_cache_size,
+    name="plan_vs_fact_month",
+)
+# Подневные расшифровки всех работ месяца (fetch_work_daily_breakdown_async).
+_breakdown_cache: WatermarkLRUCache[date, MonthWorkBreakdown] = WatermarkLRUCache(
+    get_settings().work_breakdown_cache_months,
+    name="work_breakdown_month",
+)
+_breakdown_prefetch_async = AsyncSingleFlight("work_breakdown_prefetch_async")
+# Детализация за день: дни старше окна DAILY_REVENUE_REOPEN_DAYS — закрытый уровень,
+# последние дни (включая сегодня) — открытый.
+_daily_report_cache: TieredWatermarkCache[date, DailyReportResponse] = TieredWatermarkCache(
+    get_settings().daily_report_cache_size,
+    closed_ttl_sec=get_settings().closed_period_ttl_sec,
+    open_ttl_sec=get_settings().daily_report_today_ttl_sec,
+    name="daily_report",
+)
+# Максимальная длина периода для тренда, месяцев.
+_RANGE_MAX_MONTHS = 36
+# Запас кеша итогов месяцев на рост периода контракта, пока процесс работает.
+_PERIOD_SPARE_MONTHS = 12
+
+
+def _month_count(month_from: date, month_to: date) -> int:
+    return (month_to.year - month_from.year) * 12 + month_to.month - month_from.month + 1
+
+
+# Итоги месяцев для тренда и накопительных итогов: прошлые месяцы переживают
+# загрузки (см. CLOSED_PERIOD_TTL_SEC), текущий пересчитывается по водяному знаку.
+# Вмещает и самый длинный тренд, и весь период контракта, чтобы они не вытесняли друг друга.
+_month_totals_cache: TieredWatermarkCache[date, dict[str, Any]] = TieredWatermarkCache(
+    _RANGE_MAX_MONTHS
+    + max(0, _month_count(get_settings().contract_period_start, date.today()))
+    + _PERIOD_SPARE_MONTHS
+    if get_settings().dashboard_cache_size > 0
+    else 0,
+    closed_ttl_sec=get_settings().closed_period_ttl_sec,
+    name="plan_vs_fact_month_totals",
+)
+# Дневная выручка по месяцам: после загрузки дочитываются только дни,
+# которые ещё могли измениться (см. DAILY_REVENUE_REOPEN_DAYS).
+_daily_series_cache: IncrementalSeriesCache[date, DailyRevenue] = IncrementalSeriesCache(
+    get_settings().dashboard_cache_size,
+    day=lambda row: row.date,
+    closed_ttl_sec=get_settings().closed_period_ttl_sec,
+    name="daily_revenue",
+)
+# Итоги контракта не зависят от месяца и меняются только с загрузкой данных:
+# одна запись на процесс, прогревается при смене водяного знака.
+_CONTRACT_CACHE_KEY = "contract_progress"
+_contract_cache: WatermarkLRUCache[str, dict[str, float]] = WatermarkLRUCache(
+    1 if get_settings().dashboard_cache_size > 0 else 0,
+    name="contract_progress",
+)
+
 
 ITEMS_SQL = f"""
     SELECT
@@ -81,6 +152,75 @@ LAST_UPDATED_SQL = f"""
     ) AS loads;
 """
 
+# Категория строки для агрегатов в БД: лето/зима/внерегламент, остальные — NULL.
+_CATEGORY_CASE_SQL = f"""
+            CASE
+                WHEN TRIM(pvf.smeta_code) IN ('{CATEGORY_VNR_1}', '{CATEGORY_VNR_2}')
+                    THEN '{CATEGORY_VNR_LABEL}'
+                WHEN TRIM(pvf.smeta_code) IN ('{CATEGORY_SUMMER}', '{CATEGORY_WINTER}')
+                    THEN TRIM(pvf.smeta_code)
+            END"""
+
+# Режим GROUPING SETS: итоги по категориям смет и строки по (категория, описание)
+# считаются в Postgres, Python только раскладывает результат (см. PLAN_FACT_ROLLUP).
+ITEMS_ROLLUP_SQL = f"""
+    WITH classified AS (
+        SELECT{_CATEGORY_CASE_SQL} AS category,
+            pvf.description,
+            pvf.smeta_code,
+            pvf.month_start,
+            pvf.planned_amount,
+            pvf.fact_amount_done,
+            ABS(COALESCE(pvf.delta_amount_done, 0)) AS abs_delta
+        FROM {TABLE_PLAN_VS_FACT_MONTHLY} AS pvf
+        WHERE pvf.month_start = %s
+    )
+    SELECT
+        GROUPING(description) AS is_category_total,
+        category,
+        description,
+        MIN(month_start) AS month_start,
+        (ARRAY_AGG(smeta_code ORDER BY abs_delta DESC))[1] AS smeta_code,
+        COALESCE(
+            SUM(planned_amount) FILTER (WHERE category <> '{CATEGORY_VNR_LABEL}'),
+            0
+        ) AS planned_amount,
+        COALESCE(SUM(fact_amount_done), 0) AS fact_amount_done
+    FROM classified
+    WHERE category IS NOT NULL
+    GROUP BY GROUPING SETS ((category), (category, description))
+    HAVING GROUPING(description) = 1 OR category <> '{CATEGORY_VNR_LABEL}'
+    ORDER BY is_category_total DESC, MAX(abs_delta) DESC, description;
+"""
+
+# Итоги по категориям сразу для нескольких месяцев (тренд за период). Колонки
+# совпадают со строками-итогами ITEMS_ROLLUP_SQL, чтобы их разбирал тот же агрегатор.
+RANGE_TOTALS_SQL = f"""
+    WITH classified AS (
+        SELECT{_CATEGORY_CASE_SQL} AS category,
+            pvf.month_start,
+            pvf.planned_amount,
+            pvf.fact_amount_done
+        FROM {TABLE_PLAN_VS_FACT_MONTHLY} AS pvf
+        WHERE pvf.month_start = ANY(%s)
+    )
+    SELECT
+        month_start,
+        TRUE AS is_category_total,
+        category,
+        NULL::text AS description,
+        NULL::text AS smeta_code,
+        COALESCE(
+            SUM(planned_amount) FILTER (WHERE category <> '{CATEGORY_VNR_LABEL}'),
+            0
+        ) AS planned_amount,
+        COALESCE(SUM(fact_amount_done), 0) AS fact_amount_done
+    FROM classified
+    WHERE category IS NOT NULL
+    GROUP BY month_start, category
+    ORDER BY month_start, category;
+"""
+
 CONTRACT_TOTAL_SQL = f"""
     SELECT COALESCE(SUM(contract_amount), 0) AS contract_total
     FROM {TABLE_CONTRACT_TOTAL};
@@ -116,241 +256,605 @@ SUMMARY_SQL = f"""
 
 Все публичные функции ниже помечены декоратором `@db_retry` для повторных 
 попыток при временных ошибках соединения/курсов (OperationalError, InterfaceError).
+Fetcher'ы дашборда дополнительно обёрнуты `@single_flight`: одновременные
+вызовы с одинаковыми аргументами разделяют одно вычисление и одно соединение.
+Fetcher'ы асинхронные (`*_async`, для роутеров) и читают через
+`get_async_read_connection()`; синхронно, в потоке опроса `watermark`, читаются
+только водяной знак и итоги контракта.
+Чтение идёт с реплики (DB_REPLICA_DSN), если она не отстаёт по водяному знаку
+загрузки; сам водяной знак читается из основной БД.
+Читающие запросы выполняются через `execute_prepared`: каждый текст SQL
+готовится (PREPARE) один раз на физическое соединение.
 """
 
 
  
+class _DictRowIndex(dict):
+    """Индекс колонок для строк-словарей: имя колонки и есть ключ строки.
 
+    Нужен для строк из JSON-пакета (`_batch_query`), чтобы те же функции
+    разбора читали `row[cols["name"]]` и у кортежей, и у словарей.
+    """
 
-# Функции _to_float, _safe_get_from_row и _extract_strings перенесены в utils.py
-# Используются: to_float, safe_get_from_dict, extract_dict_strings
+    def __missing__(self, key: str) -> str:
+        return key
 
 
-def _aggregate_items_streaming(cursor) -> list[DashboardItem]:
-    """
-    Агрегирует строки запроса используя курсор напрямую (потоковая обработка).
-    Минимизирует использование памяти для больших результатов.
-    Cursor должен быть RealDictCursor и находиться в контексте транзакции.
+_ColumnIndex = Mapping[str, Any]
+_DICT_ROWS: _ColumnIndex = _DictRowIndex()
+
+
+def _column_index(cursor) -> dict[str, int]:
+    """Позиции колонок результата по `cursor.description` (строится раз на запрос)."""
+
+    return {column[0]: position for position, column in enumerate(cursor.description or ())}
+
+
+class _PlanFactAggregator:
+    """Агрегация строк `skpdi_plan_vs_fact_monthly` за месяц.
+
+    Строки `ITEMS_SQL` складываются в колоночный `MonthFrame` (итоги по сезонным
+    сметам, факт внерегламента и суммы по работам считаются векторно), готовые
+    суммы `ITEMS_ROLLUP_SQL` — напрямую в словари. Сложность — O(количество строк).
     """
 
-    items_map: dict[tuple[str | None, str], dict[str, Any]] = {}
+    __slots__ = ("planned", "fact", "works", "frame")
 
-    for row in cursor:
-        smeta_code, work_name, unit = extract_dict_strings(row)
-        description = work_name or unit or UNTITLED_WORK_LABEL
-        key = (smeta_code, description)
-        month_start = row.get("month_start")
+    def __init__(self) -> None:
+        self.planned: dict[str, float] = {CATEGORY_SUMMER: 0.0, CATEGORY_WINTER: 0.0}
+        self.fact: dict[str, float] = {
+            CATEGORY_SUMMER: 0.0,
+            CATEGORY_WINTER: 0.0,
+            CATEGORY_VNR_LABEL: 0.0,
+        }
+        # (description, категория) -> [month_start, smeta_code, planned, fact]
+        self.works: dict[tuple[Any, str], list[Any]] = {}
+        self.frame: MonthFrame | None = None
+
+    def add_rows(self, rows: Iterable[Sequence[Any]], cols: _ColumnIndex = _DICT_ROWS) -> None:
+        """Добавляет строки `ITEMS_SQL`; колонки читаются по индексу `cols`."""
+
+        if self.frame is None:
+            self.frame = MonthFrame()
+        self.frame.add_rows(rows, cols)
+
+    def add_rollup_rows(self, rows: Iterable[Sequence[Any]], cols: _ColumnIndex = _DICT_ROWS) -> None:
+        """Заполняет агрегатор готовыми суммами из `ITEMS_ROLLUP_SQL`."""
+
+        i_total = cols["is_category_total"]
+        i_category = cols["category"]
+        i_description = cols["description"]
+        i_month = cols["month_start"]
+        i_smeta = cols["smeta_code"]
+        i_planned = cols["planned_amount"]
+        i_fact = cols["fact_amount_done"]
+
+        for row in rows:
+            category = row[i_category]
+            planned = to_float(row[i_planned]) or 0.0
+            fact = to_float(row[i_fact]) or 0.0
+            if row[i_total]:
+                if category in self.planned:
+                    self.planned[category] = planned
+                self.fact[category] = fact
+            else:
+                self.works[(row[i_description], category)] = [
+                    to_date(row[i_month]),
+                    row[i_smeta],
+                    planned,
+                    fact,
+                ]
+
+    def _totals(self) -> tuple[dict[str, float], dict[str, float]]:
+        """Итоги плана (включая внерегламент) и факта по категориям."""
+
+        planned, fact = dict(self.planned), dict(self.fact)
+        if self.frame is not None:
+            frame_planned, frame_fact = self.frame.category_totals()
+            for category in planned:
+                planned[category] += frame_planned[category]
+            for category in fact:
+                fact[category] += frame_fact[category]
+        planned[CATEGORY_VNR_LABEL] = (planned[CATEGORY_SUMMER] + planned[CATEGORY_WINTER]) * float(_VNR_PLAN_SHARE)
+        return planned, fact
+
+    def summary(self, month_start: date) -> dict[str, Any]:
+        """Итоги для SummaryCards, включая среднедневное значение."""
+
+        planned, fact = self._totals()
+        plan_total = sum(planned.values())
+        fact_total = sum(fact.values())
+
+        today = date.today()
+        days_in_month = calendar.monthrange(month_start.year, month_start.month)[1]
+        if month_start.year == today.year and month_start.month == today.month:
+            days_with_data = today.day - 1
+        else:
+            days_with_data = days_in_month
 
-        item = items_map.get(key)
-        if item is None:
-            item = {
+        return {
+            "planned_amount": plan_total,
+            "fact_amount": fact_total,
+            "delta_amount": fact_total - plan_total,
+            "average_daily": fact_total / days_with_data if days_with_data > 0 else 0.0,
+            "days_with_data": days_with_data,
+        }
+
+    def smeta_categories(self) -> list[dict[str, Any]]:
+        """Строки для SmetaCategories."""
+
+        planned, fact = self._totals()
+        return [
+            {
+                "key": key,
+                "title": key.capitalize(),
+                "planned": planned[key],
+                "fact": fact[key],
+                "delta": fact[key] - planned[key],
+            }
+            for key in (CATEGORY_SUMMER, CATEGORY_WINTER, CATEGORY_VNR_LABEL)
+        ]
+
+    def work_items(self) -> list[dict[str, Any]]:
+        """Строки для WorkBreakdownList (только сезонные сметы)."""
+
+        works = (
+            (key, meta, planned, fact)
+            for key, (*meta, planned, fact) in self.works.items()
+            if planned > MIN_VALUE_THRESHOLD or fact > MIN_VALUE_THRESHOLD
+        )
+        if self.frame is not None:
+            works = chain(works, self.frame.works(MIN_VALUE_THRESHOLD))
+        return [
+            {
                 "month_start": month_start,
                 "smeta": smeta_code,
                 "work_name": description,
-                "planned_amount": None,
-                "fact_amount": None,
+                "category": category,
+                "description": description,
+                "planned_amount": planned,
+                "fact_amount": fact,
+                "delta": fact - planned,
             }
-            items_map[key] = item
-        else:
-            if item.get("month_start") is None:
-                item["month_start"] = month_start
-
-        planned_value = to_float(row.get("planned_amount"))
-        smeta_normalized = normalize_string(smeta_code, default="")
-        if smeta_normalized not in _VNR_CATEGORY_CODES and planned_value is not None:
-            item["planned_amount"] = (item["planned_amount"] or 0.0) + planned_value
-
-        fact_value = to_float(row.get("fact_amount_done"))
-        if fact_value is not None:
-            item["fact_amount"] = (item["fact_amount"] or 0.0) + fact_value
-
-    aggregated_items: list[DashboardItem] = []
-    for item in items_map.values():
-        smeta_normalized = normalize_string(item.get("smeta"), default="")
-        planned_value = item.get("planned_amount")
-        if smeta_normalized in _VNR_CATEGORY_CODES:
-            planned_value = 0.0
-
-        aggregated_items.append(
-            DashboardItem(
-                month_start=item.get("month_start"),
-                smeta=item.get("smeta"),
-                work_name=item.get("work_name"),
-                planned_amount=planned_value,
-                fact_amount=item.get("fact_amount"),
-            )
-        )
-
-    return aggregated_items
+            for (description, category), (month_start, smeta_code), planned, fact in works
+        ]
 
 
-def _fetch_dates(
+def _fetch_rows(
     conn,
     sql: str,
     params: tuple[Any, ...] | None = None,
+) -> tuple[dict[str, int], list[tuple]]:
+    """Выполняет SQL обычным (кортежным) курсором: (индекс колонок, строки)."""
+
+    with conn.cursor() as cur:
+        execute_prepared(cur, sql, params)
+        return _column_index(cur), cur.fetchall() or []
+
+
+async def _fetch_rows_async(
+    sql: str,
+    params: tuple[Any, ...] | None = None,
+) -> tuple[dict[str, int], list[tuple]]:
+    """Выполняет SQL на отдельном соединении: (индекс колонок, строки)."""
+
+    async with get_async_read_connection() as conn:
+        async with conn.cursor() as cur:
+            await execute_prepared_async(cur, sql, params)
+            return _column_index(cur), await cur.fetchall() or []
+
+
+async def _iter_rows_async(
+    sql: str,
+    params: tuple[Any, ...] | None = None,
     *,
-    cursor_factory=None,
-) -> list[date]:
-    """Вспомогательная утилита для выборки списка дат/месяцев.
+    batch_size: int = 0,
+    cursor_name: str = "stream_rows",
+) -> AsyncIterator[tuple[dict[str, int], list[tuple]]]:
+    """Читает результат пачками по `batch_size` строк на отдельном соединении (см. `_stream_rows_async`)."""
+
+    if batch_size <= 0:
+        yield await _fetch_rows_async(sql, params)
+        return
+
+    async with get_async_read_connection() as conn:
+        async for chunk in _stream_rows_async(conn, sql, params, batch_size=batch_size, cursor_name=cursor_name):
+            yield chunk
 
-    Выполняет переданный SQL, читает все строки и возвращает
-    плоский список первых столбцов, отфильтровывая None.
+
+async def _stream_rows_async(
+    conn,
+    sql: str,
+    params: tuple[Any, ...] | None = None,
+    *,
+    batch_size: int = 0,
+    cursor_name: str = "stream_rows",
+) -> AsyncIterator[tuple[dict[str, int], list[tuple]]]:
+    """Читает результат на соединении `conn` пачками: (индекс колонок, строки).
+
+    При `batch_size > 0` используется серверный курсор: в памяти процесса
+    одновременно находится не больше одной пачки. aiopg работает только
+    в autocommit, поэтому курсор объявляется явно (`DECLARE ... CURSOR`)
+    внутри собственной транзакции; DECLARE не принимает EXECUTE, поэтому
+    он читает без подготовленного выражения (см. `execute_prepared`).
+    При `batch_size <= 0` — обычный `fetchall()` одной пачкой.
     """
 
-    with conn.cursor(cursor_factory=cursor_factory) as cur:
-        cur.execute(sql, params or ())
-        rows: Iterable[Optional[tuple]] = cur.fetchall() or []
+    if batch_size <= 0:
+        async with conn.cursor() as cur:
+            await execute_prepared_async(cur, sql, params)
+            yield _column_index(cur), await cur.fetchall() or []
+        return
+
+    async with conn.cursor() as cur:
+        await cur.execute("BEGIN")
+        try:
+            await cur.execute(
+                f"DECLARE {cursor_name} NO SCROLL CURSOR FOR {sql.strip().rstrip(';')}",
+                params or (),
+            )
+            while True:
+                await cur.execute(f"FETCH FORWARD {int(batch_size)} FROM {cursor_name}")
+                rows = await cur.fetchall()
+                if not rows:
+                    break
+                yield _column_index(cur), rows
+        finally:
+            await cur.execute("ROLLBACK")
+
+
+async def _fetch_dates_async(sql: str, params: tuple[Any, ...] | None = None) -> list[date]:
+    """Список первых столбцов результата (дат/месяцев) без None."""
+
+    _, rows = await _fetch_rows_async(sql, params)
     return [row[0] for row in rows if row and row[0] is not None]
 
 
-def _fetch_daily_fact_totals(conn, month_start: date) -> list[DailyRevenue]:
-    """Извлекает дневные суммы фактических работ используя билдер."""
+def _batch_query(statements: dict[str, tuple[str, tuple[object, ...]]]) -> tuple[str, tuple[object, ...]]:
+    """Склеивает несколько SELECT в один запрос (один сетевой round trip).
+
+    Результат каждого запроса возвращается отдельной колонкой `name` в виде
+    JSON-массива строк; параметры объединяются в порядке запросов. Значения
+    приходят JSON-типами: даты — строками ISO, numeric — float.
+    """
+
+    columns: list[str] = []
+    params: list[object] = []
+    for name, (sql, statement_params) in statements.items():
+        body = sql.strip().rstrip(";")
+        columns.append(f"(SELECT COALESCE(json_agg(t), '[]'::json) FROM ({body}) AS t) AS {name}")
+        params.extend(statement_params)
+    return "SELECT\n    " + ",\n    ".join(columns) + ";", tuple(params)
+
+
+def _split_batch(rows: list[tuple], names: Iterable[str]) -> dict[str, list[dict[str, Any]]]:
+    # Колонки пакета идут в порядке запросов; строки внутри — JSON-объекты
+    # (читаются через `_DICT_ROWS`).
+    row = rows[0] if rows else ()
+    return {name: (value or []) for name, value in zip(names, row)} if row else {name: [] for name in names}
+
+
+async def _fetch_batch_async(statements: dict[str, tuple[str, tuple[object, ...]]]) -> dict[str, list[dict[str, Any]]]:
+    """Выполняет `_batch_query` и раскладывает результат по именам запросов."""
+
+    if not statements:
+        return {}
+    _, rows = await _fetch_rows_async(*_batch_query(statements))
+    return _split_batch(rows, statements)
+
+
+def _daily_fact_totals_query(month_start: date, since: date | None = None) -> tuple[str, tuple[object, ...]]:
+    """Дневные суммы месяца; при `since` — только дни начиная с него."""
+
+    builder = (
+        FactQueryBuilder()
+        .select(
+            "date_done::date AS work_date",
+            "SUM(total_amount) AS fact_total",
+        )
+        .month_start(month_start)
+    )
+    if since is not None and since > month_start:
+        builder.date_range(since, get_next_month_start(month_start))
+    return (
+        builder.status()
+        .group_by("work_date")
+        .having("SUM(total_amount) IS NOT NULL")
+        .order_by("work_date")
+        .build()
+    )
+
+
+def _daily_reopen_from(month_start: date) -> date | None:
+    """Первый день месяца, который ещё может измениться; None — месяц закрыт."""
+
+    reopen_from = max(month_start, date.today() - timedelta(days=get_settings().daily_revenue_reopen_days))
+    return reopen_from if reopen_from < get_next_month_start(month_start) else None
+
+
+def _is_closed_day(target_date: date) -> bool:
+    """День старше окна DAILY_REVENUE_REOPEN_DAYS: загрузки его уже не меняют."""
+
+    return target_date < date.today() - timedelta(days=get_settings().daily_revenue_reopen_days)
+
+
+def _build_daily_fact_totals(rows: Iterable[Sequence[Any]], cols: _ColumnIndex = _DICT_ROWS) -> list[DailyRevenue]:
+    i_date, i_amount = cols["work_date"], cols["fact_total"]
     daily_rows: list[DailyRevenue] = []
-    with conn.cursor(cursor_factory=RealDictCursor) as cur:
-        try:
-            sql, params = (
-                FactQueryBuilder()
-                .select(
-                    "date_done::date AS work_date",
-                    "SUM(total_amount) AS fact_total",
-                )
-                .month_start(month_start)
-                .status()
-                .group_by("work_date")
-                .having("SUM(total_amount) IS NOT NULL")
-                .order_by("work_date")
-                .build()
-            )
-            cur.execute(sql, params)
-            rows = cur.fetchall() or []
-            for row in rows:
-                amount = to_float(row.get("fact_total"))
-                work_date = row.get("work_date")
-                if amount is None or work_date is None:
-                    continue
-                daily_rows.append(DailyRevenue(date=work_date, amount=amount))
-        except Exception as exc:  # noqa: BLE001
-            logger.warning(
-                "Не удалось загрузить дневные суммы за %s: %s. Используется пустой список.",
-                month_start,
-                exc,
-                exc_info=True,
+    for row in rows:
+        amount = to_float(row[i_amount])
+        work_date = row[i_date]
+        if amount is None or work_date is None:
+            continue
+        daily_rows.append(DailyRevenue(date=work_date, amount=amount))
+    return daily_rows
+
+
+def _work_pattern(work_identifier: str) -> str:
+    return f"%{work_identifier.strip()}%"
+
+
+def _ilike_matcher(pattern: str) -> Callable[[str], Any]:
+    """Python-эквивалент `value ILIKE pattern` (экранирование — обратный слеш)."""
+
+    parts: list[str] = []
+    chars = iter(pattern)
+    for char in chars:
+        if char == "\\":
+            parts.append(re.escape(next(chars, "\\")))
+        elif char == "%":
+            parts.append(".*")
+        elif char == "_":
+            parts.append(".")
+        else:
+            parts.append(re.escape(char))
+    return re.compile("".join(parts), re.IGNORECASE | re.DOTALL).fullmatch
+
+
+def _work_breakdown_query(month_start: date, work_identifier: str) -> tuple[str, tuple[object, ...]]:
+    work_param = _work_pattern(work_identifier)
+    return (
+        FactQueryBuilder()
+        .select(
+            "date_done::date AS work_date",
+            "SUM(COALESCE(total_volume, 0)) AS total_volume",
+            "MAX(COALESCE(unit::text, '')) AS unit",
+            "SUM(COALESCE(total_amount, 0)) AS total_amount",
+        )
+        .date_range(month_start, get_next_month_start(month_start))
+        .status()
+        .ilike_description(work_param)
+        .group_by("work_date")
+        .order_by("work_date")
+        .build()
+    )
+
+
+def _build_work_breakdown(fetched: Iterable[Sequence[Any]], cols: _ColumnIndex = _DICT_ROWS) -> list[DailyWorkVolume]:
+    i_date, i_volume = cols["work_date"], cols["total_volume"]
+    i_unit, i_amount = cols["unit"], cols["total_amount"]
+    rows: list[DailyWorkVolume] = []
+    for row in fetched:
+        work_date = row[i_date]
+        vol = to_float(row[i_volume])
+        unit = normalize_string(row[i_unit])
+        total_amount = to_float(row[i_amount])
+        if work_date is None or vol is None:
+            continue
+        rows.append(
+            DailyWorkVolume(
+                date=work_date,
+                amount=vol,
+                unit=unit,
+                total_amount=total_amount,
             )
-            conn.rollback()
-            return []
+        )
+    return rows
 
-    return daily_rows
 
+def _works_breakdown_query(
+    month_start: date,
+    work_identifiers: Iterable[str] | None = None,
+) -> tuple[str, tuple[object, ...]]:
+    """Строки (описание, дата) за месяц; без `work_identifiers` — по всем работам."""
+
+    builder = (
+        FactQueryBuilder()
+        .select(
+            "COALESCE(description::text, '') AS description",
+            "date_done::date AS work_date",
+            "SUM(COALESCE(total_volume, 0)) AS total_volume",
+            "MAX(COALESCE(unit::text, '')) AS unit",
+            "SUM(COALESCE(total_amount, 0)) AS total_amount",
+        )
+        .date_range(month_start, get_next_month_start(month_start))
+        .status()
+    )
+    if work_identifiers is not None:
+        builder.ilike_any_description([_work_pattern(work) for work in work_identifiers])
+    return builder.group_by("description", "work_date").order_by("work_date").build()
 
- 
 
+def _work_series(breakdown: MonthWorkBreakdown, work_identifier: str) -> list[DailyWorkVolume]:
+    """Ряд работы по тем же правилам, что и `ILIKE '%работа%'` в одиночном запросе."""
+
+    pattern = _work_pattern(work_identifier)
+    return [
+        DailyWorkVolume(date=work_date, amount=volume, unit=unit, total_amount=amount)
+        for work_date, volume, unit, amount in breakdown.series(pattern, _ilike_matcher(pattern))
+    ]
 
+
+def _unique_works(work_identifiers: Iterable[str]) -> tuple[str, ...]:
+    return tuple(dict.fromkeys(work for work in work_identifiers if work and work.strip()))
+
+
+def _log_work_breakdown_error(work_identifier: str, month_start: date, exc: Exception) -> None:
+    logger.warning(
+        "Не удалось загрузить подневную расшифровку для '%s' за %s: %s",
+        work_identifier,
+        month_start,
+        exc,
+        exc_info=True,
+    )
+
+
+async def _prefetch_month_breakdown_async(
+    month_start: date,
+    last_updated: datetime | None,
+) -> MonthWorkBreakdown | None:
+    try:
+        cols, rows = await _fetch_rows_async(*_works_breakdown_query(month_start))
+    except Exception as exc:  # noqa: BLE001
+        _log_work_breakdown_error("*", month_start, exc)
+        return None
+    breakdown = MonthWorkBreakdown(month_start, rows, cols)
+    _breakdown_cache.put(month_start, breakdown, last_updated)
+    return breakdown
+
+
+async def _month_breakdown_async(month_start: date) -> MonthWorkBreakdown | None:
+    """Расшифровки всех работ месяца: из кеша или одним запросом при первом обращении."""
+
+    last_updated = await watermark.current_async()
+    breakdown = _breakdown_cache.get(month_start, last_updated)
+    if breakdown is None:
+        breakdown = await _breakdown_prefetch_async.do(
+            (month_start, last_updated),
+            lambda: _prefetch_month_breakdown_async(month_start, last_updated),
+        )
+    return breakdown
+
+
+@single_flight(label="fetch_work_daily_breakdown_async")
 @db_retry(
     retries=1,
     delay_sec=_DB_RETRY_DELAY_SEC,
     backoff=_DB_RETRY_BACKOFF,
     exceptions=_DB_RETRYABLE_ERRORS,
-    label="fetch_work_daily_breakdown",
+    label="fetch_work_daily_breakdown_async",
 )
-def fetch_work_daily_breakdown(month_start: date, work_identifier: str) -> list[DailyWorkVolume]:
+async def fetch_work_daily_breakdown_async(month_start: date, work_identifier: str) -> list[DailyWorkVolume]:
     """Возвращает список по-дневных объёмов (total_volume) для указанной строки работ за месяц.
 
     В результате возвращается список объектов с полями `date`, `amount` и `unit`.
     Поиск выполняется по полю `description` с приведением к нижнему регистру (ILIKE).
+    При первом обращении к месяцу одним запросом загружаются расшифровки всех
+    работ (`MonthWorkBreakdown`), дальше ответы берутся из памяти до смены
+    водяного знака. При `WORK_BREAKDOWN_CACHE_MONTHS=0` — отдельный запрос на работу.
     """
 
-    results: list[DailyWorkVolume] = []
     if not work_identifier:
-        return results
+        return []
 
     # На фронтенд может прийти любая дата внутри месяца, поэтому нормализуем
     # значение к первому дню месяца, чтобы захватывать весь период.
     month_start = get_month_start(month_start)
+    if _breakdown_cache.maxsize:
+        breakdown = await _month_breakdown_async(month_start)
+        return _work_series(breakdown, work_identifier) if breakdown is not None else []
 
-    rows: list[DailyWorkVolume] = []
-    next_month_start = get_next_month_start(month_start)
-    with get_connection() as conn:
+    sql, params = _work_breakdown_query(month_start, work_identifier)
+    try:
+        cols, fetched = await _fetch_rows_async(sql, params)
+    except Exception as exc:  # noqa: BLE001
+        _log_work_breakdown_error(work_identifier, month_start, exc)
+        return []
+    return _build_work_breakdown(fetched, cols)
+
+
+@single_flight(label="fetch_works_daily_breakdown_async")
+@db_retry(
+    retries=1,
+    delay_sec=_DB_RETRY_DELAY_SEC,
+    backoff=_DB_RETRY_BACKOFF,
+    exceptions=_DB_RETRYABLE_ERRORS,
+    label="fetch_works_daily_breakdown_async",
+)
+async def fetch_works_daily_breakdown_async(
+    month_start: date,
+    work_identifiers: tuple[str, ...],
+) -> dict[str, list[DailyWorkVolume]]:
+    """Подневные расшифровки сразу для нескольких работ за месяц.
+
+    Один сгруппированный запрос (описание, дата) вместо ILIKE-скана на каждую
+    работу — либо готовые расшифровки месяца из кеша (см. `fetch_work_daily_breakdown_async`).
+    Возвращает словарь работа -> список `DailyWorkVolume`.
+    """
+
+    works = _unique_works(work_identifiers)
+    if not works:
+        return {}
+
+    month_start = get_month_start(month_start)
+    breakdown: MonthWorkBreakdown | None = None
+    if _breakdown_cache.maxsize:
+        breakdown = await _month_breakdown_async(month_start)
+    else:
         try:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                work_param = f"%{work_identifier.strip()}%"
-                sql, params = (
-                    FactQueryBuilder()
-                    .select(
-                        "date_done::date AS work_date",
-                        "SUM(COALESCE(total_volume, 0)) AS total_volume",
-                        "MAX(COALESCE(unit::text, '')) AS unit",
-                        "SUM(COALESCE(total_amount, 0)) AS total_amount",
-                    )
-                    .date_range(month_start, next_month_start)
-                    .status()
-                    .ilike_description(work_param)
-                    .group_by("work_date")
-                    .order_by("work_date")
-                    .build()
-                )
-                cur.execute(sql, params)
-                fetched = cur.fetchall() or []
-                for row in fetched:
-                    work_date = row.get("work_date")
-                    vol = to_float(row.get("total_volume"))
-                    unit = normalize_string(row.get("unit"))
-                    total_amount = to_float(row.get("total_amount"))
-                    if work_date is None or vol is None:
-                        continue
-                    rows.append(
-                        DailyWorkVolume(
-                            date=work_date,
-                            amount=vol,
-                            unit=unit,
-                            total_amount=total_amount,
-                        )
-                    )
+            cols, fetched = await _fetch_rows_async(*_works_breakdown_query(month_start, works))
         except Exception as exc:  # noqa: BLE001
-            logger.warning(
-                "Не удалось загрузить подневную расшифровку для '%s' за %s: %s",
-                work_identifier,
-                month_start,
-                exc,
-                exc_info=True,
-            )
-            conn.rollback()
-            return []
-    return rows
+            _log_work_breakdown_error(", ".join(works), month_start, exc)
+        else:
+            breakdown = MonthWorkBreakdown(month_start, fetched, cols)
+
+    if breakdown is None:
+        return {work: [] for work in works}
+    return {work: _work_series(breakdown, work) for work in works}
+
+
+def _first_value(rows: list[Any], column: str, cols: _ColumnIndex = _DICT_ROWS) -> Any:
+    return rows[0][cols[column]] if rows else None
+
 
+def _build_contract_progress(contract_total: Any, executed_total: Any) -> dict[str, float]:
+    return {
+        "contract_total": to_float(contract_total) or 0.0,
+        "executed_total": to_float(executed_total) or 0.0,
+    }
 
-def _fetch_contract_progress(conn, _selected_month: date) -> dict[str, float] | None:
+
+def _fetch_contract_progress(conn) -> dict[str, float] | None:
     """Возвращает агрегаты по контракту и выполнению, логирует и возвращает None при ошибке."""
 
-    # Для карточки «Выполнение контракта» факты текущего месяца должны
-    # рассчитываться относительно реального текущего календарного месяца,
-    # а не выбранного пользователем периода. Поэтому месяц получения данных
-    # вычисляем от сегодняшней даты.
     try:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(CONTRACT_TOTAL_SQL)
-            contract_row = cur.fetchone() or {}
-            contract_total = to_float(contract_row.get("contract_total")) or 0.0
-
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(CONTRACT_EXECUTED_SQL)
-            executed_row = cur.fetchone() or {}
-            executed_total = to_float(executed_row.get("executed_total")) or 0.0
+        contract_cols, contract_rows = _fetch_rows(conn, CONTRACT_TOTAL_SQL)
+        executed_cols, executed_rows = _fetch_rows(conn, CONTRACT_EXECUTED_SQL)
 
-        return {
-            "contract_total": contract_total,
-            "executed_total": executed_total,
-        }
-    except Exception as exc:  # noqa: BLE001
-        logger.warning(
-            "Не удалось загрузить агрегаты по контракту за %s: %s",
-            date.today().replace(day=1),
-            exc,
-            exc_info=True,
+        return _build_contract_progress(
+            _first_value(contract_rows, "contract_total", contract_cols),
+            _first_value(executed_rows, "executed_total", executed_cols),
         )
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Не удалось загрузить агрегаты по контракту: %s", exc, exc_info=True)
         conn.rollback()
         return None
 
 
+def _refresh_contract_progress(last_updated: datetime | None) -> None:
+    """Прогревает кеш итогов контракта при смене водяного знака (вызывается из `watermark`)."""
+
+    if _contract_cache.maxsize == 0 or _contract_cache.get(_CONTRACT_CACHE_KEY, last_updated) is not None:
+        return
+    with operation_label("refresh_contract_progress"), get_read_connection() as conn:
+        progress = _fetch_contract_progress(conn)
+    if progress is not None:
+        _contract_cache.put(_CONTRACT_CACHE_KEY, progress, last_updated)
+
+
+def _contract_progress(batch: dict[str, list[Any]], last_updated: datetime | None) -> dict[str, float] | None:
+    """Итоги контракта из пакета (и в кеш) или из кеша, если пакет их не читал."""
+
+    if "contract_total" in batch:
+        progress = _build_contract_progress(
+            _first_value(batch["contract_total"], "contract_total"),
+            _first_value(batch["contract_executed"], "executed_total"),
+        )
+        _contract_cache.put(_CONTRACT_CACHE_KEY, progress, last_updated)
+        return progress
+    return _contract_cache.get(_CONTRACT_CACHE_KEY, last_updated)
+
+
 def _calculate_daily_average(
     month_start: date,
     daily_rows: list[DailyRevenue],
@@ -385,228 +889,486 @@ def _calculate_daily_average(
     return sum(past_days_amounts) / len(past_days_amounts)
 
 
+def _month_cache_key(month_start: date) -> tuple[date, date]:
+    # Среднедневное значение текущего месяца зависит от сегодняшней даты,
+    # поэтому она входит в ключ кеша.
+    return (month_start, date.today())
+
+
+def _plan_vs_fact_sql() -> tuple[str, Callable[[_PlanFactAggregator, Iterable[Sequence[Any]], _ColumnIndex], None]]:
+    """Возвращает SQL строк месяца и способ загрузить их в агрегатор."""
+
+    if get_settings().plan_fact_rollup:
+        return ITEMS_ROLLUP_SQL, _PlanFactAggregator.add_rollup_rows
+    return ITEMS_SQL, _PlanFactAggregator.add_rows
+
+
+def _dashboard_statements(
+    month_start: date,
+    *,
+    with_contract: bool = True,
+    daily_since: date | None = None,
+) -> dict[str, tuple[str, tuple[object, ...]]]:
+    """Все выборки одного запроса дашборда (выполняются пакетом, см. `_batch_query`).
+
+    `daily_since` — с какого дня читать дневные суммы; без него они не читаются.
+    """
+
+    items_sql, _ = _plan_vs_fact_sql()
+    statements = {"items": (items_sql, (month_start,))}
+    if with_contract:
+        statements["contract_total"] = (CONTRACT_TOTAL_SQL, ())
+        statements["contract_executed"] = (CONTRACT_EXECUTED_SQL, ())
+    if daily_since is not None:
+        statements["daily_totals"] = _daily_fact_totals_query(month_start, daily_since)
+    return statements
+
+
+def _dashboard_plan(
+    month_start: date,
+    last_updated: datetime | None,
+) -> tuple[
+    dict[str, tuple[str, tuple[object, ...]]],
+    tuple[str, tuple[object, ...]],
+    int,
+    tuple[list[DailyRevenue], date | None],
+]:
+    """Разбивает выборки дашборда на пакет и отдельный потоковый запрос строк.
+
+    При `DB_STREAM_BATCH_SIZE > 0` строки месяца не входят в JSON-пакет, а читаются
+    серверным курсором пачками прямо в агрегатор — пик памяти не зависит от месяца.
+    Итоги контракта читаются, только если их ещё нет в кеше для `last_updated`,
+    дневные суммы — только за дни, которые могли измениться с прошлого расчёта.
+    Последний элемент — (известный ряд дневной выручки, с какого дня его дочитать).
+    """
+
+    with_contract = _contract_cache.get(_CONTRACT_CACHE_KEY, last_updated) is None
+    daily_plan = _daily_series_cache.plan(month_start, last_updated, start=month_start)
+    statements = _dashboard_statements(month_start, with_contract=with_contract, daily_since=daily_plan[1])
+    stream_batch_size = get_settings().db_stream_batch_size
+    items_statement = statements["items"]
+    if stream_batch_size > 0:
+        del statements["items"]
+    return statements, items_statement, stream_batch_size, daily_plan
+
+
+def _daily_revenue(
+    month_start: date,
+    batch: dict[str, list[Any]],
+    daily_plan: tuple[list[DailyRevenue], date | None],
+    last_updated: datetime | None,
+) -> list[DailyRevenue] | None:
+    """Ряд дневной выручки: закрытые дни из кеша, остальные — из пакета."""
+
+    series, since = daily_plan
+    if since is None:
+        return series
+    if "daily_totals" not in batch:
+        return None
+    return _daily_series_cache.merge(
+        month_start,
+        series,
+        _build_daily_fact_totals(batch["daily_totals"]),
+        last_updated,
+        since=since,
+        open_from=_daily_reopen_from(month_start),
+    )
+
+
+def _log_dashboard_batch_error(month_start: date, exc: Exception) -> None:
+    logger.warning(
+        "Не удалось выполнить пакетный запрос дашборда за %s: %s. Загружаю только строки месяца.",
+        month_start,
+        exc,
+        exc_info=True,
+    )
+
+
+def _plan_vs_fact_result(
+    month_start: date,
+    aggregator: _PlanFactAggregator,
+    batch: dict[str, list[dict[str, Any]]],
+    daily_plan: tuple[list[DailyRevenue], date | None],
+    last_updated: datetime | None,
+) -> tuple[list[dict[str, Any]], dict[str, Any], datetime | None, list[dict[str, Any]]]:
+    summary = aggregator.summary(month_start)
+
+    # Если пакет не удался и кеш пуст, контракт и дневные суммы отсутствуют — карточки пустые.
+    progress = _contract_progress(batch, last_updated)
+    if progress is not None:
+        contract_total = progress["contract_total"]
+        summary["contract_amount"] = contract_total
+        summary["contract_executed"] = progress["executed_total"]
+        summary["contract_completion_pct"] = (
+            progress["executed_total"] / contract_total if contract_total else None
+        )
+    daily_rows = _daily_revenue(month_start, batch, daily_plan, last_updated)
+    if daily_rows is not None:
+        summary["daily_revenue"] = daily_rows
+        summary["average_daily_revenue"] = _calculate_daily_average(
+            month_start, daily_rows, summary["fact_amount"]
+        )
+
+    # Возвращаем все агрегаты для фронта
+    return (
+        aggregator.work_items(),
+        summary,
+        last_updated,
+        aggregator.smeta_categories(),
+    )
+
+
+@single_flight(label="fetch_plan_vs_fact_for_month_async")
 @db_retry(
     retries=1,
     delay_sec=_DB_RETRY_DELAY_SEC,
     backoff=_DB_RETRY_BACKOFF,
     exceptions=_DB_RETRYABLE_ERRORS,
-    label="fetch_plan_vs_fact_for_month",
+    label="fetch_plan_vs_fact_for_month_async",
 )
-def fetch_plan_vs_fact_for_month(
+async def fetch_plan_vs_fact_for_month_async(
     month_start: date,
-) -> tuple[list[DashboardItem], DashboardSummary | None, datetime | None]:
+) -> tuple[list[dict[str, Any]], dict[str, Any], datetime | None, list[dict[str, Any]]]:
     """
     Читает данные из view skpdi_plan_vs_fact_monthly для конкретного месяца
-    и собирает summary. Использует потоковую обработку для оптимизации памяти.
-    Возвращает: (items, summary, last_updated)
+    и собирает summary за один проход по строкам (см. `_PlanFactAggregator`).
+    Строки месяца, агрегаты контракта (если их нет в кеше) и дневные суммы читаются одним пакетом.
+    При включённом `PLAN_FACT_ROLLUP` суммы считаются в БД через GROUPING SETS.
+    Результат кешируется по месяцу до смены водяного знака `last_updated`;
+    если пакет не удался, отдаются только строки месяца и ответ не кешируется.
+    Возвращает: (items, summary, last_updated, smeta_categories)
     """
-    items: list[DashboardItem]
 
-    summary = None
-    last_updated = None
-    with get_connection() as conn:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(ITEMS_SQL, (month_start,))
-            items_raw = cur.fetchall()
-
-        # Агрегация по категориям
-            plan_leto = sum(
-                to_float(row["planned_amount"]) or 0.0
-                for row in items_raw
-                if normalize_string(row["smeta_code"], "") == CATEGORY_SUMMER
-            )
-            plan_zima = sum(
-                to_float(row["planned_amount"]) or 0.0
-                for row in items_raw
-                if normalize_string(row["smeta_code"], "") == CATEGORY_WINTER
-            )
-            plan_vnereglament = (plan_leto + plan_zima) * float(_VNR_PLAN_SHARE)
-            plan_total = plan_leto + plan_zima + plan_vnereglament
+    cache_key = _month_cache_key(month_start)
+    last_updated = await watermark.current_async()
+    cached = _month_cache.get(cache_key, last_updated)
+    if cached is not None:
+        return cached
 
-            fact_leto = sum(
-                to_float(row["fact_amount_done"]) or 0.0
-                for row in items_raw
-                if normalize_string(row["smeta_code"], "") == CATEGORY_SUMMER
-            )
-            fact_zima = sum(
-                to_float(row["fact_amount_done"]) or 0.0
-                for row in items_raw
-                if normalize_string(row["smeta_code"], "") == CATEGORY_WINTER
-            )
-            fact_vnereglament = sum(
-                to_float(row["fact_amount_done"]) or 0.0
-                for row in items_raw
-                if normalize_string(row["smeta_code"], "") in CATEGORY_VNR_CODES
+    statements, items_statement, stream_batch_size, daily_plan = _dashboard_plan(month_start, last_updated)
+    _, load_rows = _plan_vs_fact_sql()
+    aggregator = _PlanFactAggregator()
+    degraded = False
+    try:
+        batch = await _fetch_batch_async(statements)
+    except _DB_RETRYABLE_ERRORS:
+        raise
+    except Exception as exc:  # noqa: BLE001
+        _log_dashboard_batch_error(month_start, exc)
+        batch, degraded = {}, True
+
+    if "items" in batch:
+        load_rows(aggregator, batch["items"], _DICT_ROWS)
+    else:
+        async for cols, chunk in _iter_rows_async(
+            *items_statement,
+            batch_size=stream_batch_size,
+            cursor_name=_ITEMS_CURSOR_NAME,
+        ):
+            load_rows(aggregator, chunk, cols)
+
+    result = _plan_vs_fact_result(month_start, aggregator, batch, daily_plan, last_updated)
+    # Без пакета в ответе нет карточек контракта и дневной выручки: такой ответ
+    # не кешируется, следующий запрос снова попробует пакет.
+    if not degraded:
+        _month_cache.put(cache_key, result, last_updated)
+    return result
+
+
+def _month_starts(month_from: date, month_to: date, *, max_months: int | None = None) -> list[date]:
+    """Первые числа месяцев периода включительно; ValueError для неверного периода."""
+
+    start, end = month_from.replace(day=1), month_to.replace(day=1)
+    if start > end:
+        raise ValueError("Начало периода позже его конца")
+    count = _month_count(start, end)
+    if max_months is not None and count > max_months:
+        raise ValueError(f"Период не может быть длиннее {max_months} месяцев")
+    return [
+        date(start.year + (start.month - 1 + offset) // 12, (start.month - 1 + offset) % 12 + 1, 1)
+        for offset in range(count)
+    ]
+
+
+def _range_months(month_from: date, month_to: date) -> list[date]:
+    """Месяцы тренда (не длиннее `_RANGE_MAX_MONTHS`); ValueError для неверного периода."""
+
+    return _month_starts(month_from, month_to, max_months=_RANGE_MAX_MONTHS)
+
+
+def _period_months(period_start: date | None) -> list[date]:
+    """Месяцы накопительного периода до текущего; ValueError для неверного начала.
+
+    Начало не раньше `CONTRACT_PERIOD_START`: период не длиннее контракта
+    и целиком помещается в `_month_totals_cache`.
+    """
+
+    contract_start = get_settings().contract_period_start
+    start = period_start or contract_start
+    if start.replace(day=1) < contract_start.replace(day=1):
+        raise ValueError(f"Начало периода не может быть раньше начала контракта ({contract_start.isoformat()})")
+    return _month_starts(start, date.today())
+
+
+def validate_range(month_from: date, month_to: date) -> None:
+    """Проверяет период тренда до обращения к БД; ValueError для неверного периода."""
+
+    _range_months(month_from, month_to)
+
+
+def validate_period(period_start: date | None) -> None:
+    """Проверяет начало периода; ValueError, если оно раньше начала контракта или в будущем."""
+
+    _period_months(period_start)
+
+
+def _is_closed_month(month_start: date) -> bool:
+    return month_start < date.today().replace(day=1)
+
+
+def _month_totals_from(
+    month_start: date,
+    summary: dict[str, Any],
+    smeta_categories: list[dict[str, Any]],
+    has_data: bool,
+) -> dict[str, Any]:
+    return {
+        "month": month_start,
+        "summary": {key: summary[key] for key in ("planned_amount", "fact_amount", "delta_amount")},
+        "smeta_categories": smeta_categories,
+        "has_data": has_data,
+    }
+
+
+def _cached_month_totals(month_start: date, last_updated: datetime | None) -> dict[str, Any] | None:
+    """Итоги месяца из кеша тренда или из полного кеша дашборда."""
+
+    closed = _is_closed_month(month_start)
+    totals = _month_totals_cache.get(month_start, last_updated, closed=closed)
+    if totals is not None:
+        return totals
+    cached = _month_cache.get(_month_cache_key(month_start), last_updated)
+    if cached is None:
+        return None
+    items, summary, _, smeta_categories = cached
+    totals = _month_totals_from(month_start, summary, smeta_categories, bool(items))
+    _month_totals_cache.put(month_start, totals, last_updated, closed=closed)
+    return totals
+
+
+def _range_plan(
+    months: list[date], last_updated: datetime | None
+) -> tuple[dict[date, dict[str, Any]], list[date]]:
+    """Делит месяцы периода на уже посчитанные и те, что нужно прочитать из БД."""
+
+    found: dict[date, dict[str, Any]] = {}
+    missing: list[date] = []
+    for month_start in months:
+        totals = _cached_month_totals(month_start, last_updated)
+        if totals is None:
+            missing.append(month_start)
+        else:
+            found[month_start] = totals
+    return found, missing
+
+
+def _build_range_totals(
+    missing: list[date],
+    rows: Iterable[Sequence[Any]],
+    cols: _ColumnIndex,
+    last_updated: datetime | None,
+) -> dict[date, dict[str, Any]]:
+    i_month = cols["month_start"]
+    by_month: dict[date, list[Sequence[Any]]] = {}
+    for row in rows:
+        by_month.setdefault(to_date(row[i_month]), []).append(row)
+
+    found: dict[date, dict[str, Any]] = {}
+    for month_start in missing:
+        aggregator = _PlanFactAggregator()
+        month_rows = by_month.get(month_start, [])
+        aggregator.add_rollup_rows(month_rows, cols)
+        found[month_start] = totals = _month_totals_from(
+            month_start,
+            aggregator.summary(month_start),
+            aggregator.smeta_categories(),
+            bool(month_rows),
+        )
+        _month_totals_cache.put(month_start, totals, last_updated, closed=_is_closed_month(month_start))
+    return found
+
+
+def _range_result(
+    months: list[date],
+    found: dict[date, dict[str, Any]],
+    last_updated: datetime | None,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]], datetime | None]:
+    month_totals = [found[month_start] for month_start in months]
+    totals: dict[str, dict[str, Any]] = {}
+    for month in month_totals:
+        for category in month["smeta_categories"]:
+            total = totals.setdefault(
+                category["key"],
+                {"key": category["key"], "title": category["title"], "planned": 0.0, "fact": 0.0},
             )
-            fact_total = fact_leto + fact_zima + fact_vnereglament
+            total["planned"] += category["planned"]
+            total["fact"] += category["fact"]
+    for total in totals.values():
+        total["delta"] = total["fact"] - total["planned"]
+    return month_totals, list(totals.values()), last_updated
 
-            # Для SummaryCards
-            summary = {
-                "planned_amount": plan_total,
-                "fact_amount": fact_total,
-                "delta_amount": fact_total - plan_total,
-            }
 
-            # Среднедневное значение
-            today = date.today()
-            days_in_month = calendar.monthrange(month_start.year, month_start.month)[1]
-            if month_start.year == today.year and month_start.month == today.month:
-                days_with_data = today.day - 1
-            else:
-                days_with_data = days_in_month
-            summary["average_daily"] = fact_total / days_with_data if days_with_data > 0 else 0.0
-            summary["days_with_data"] = days_with_data
-
-            # Для SmetaCategories
-            smeta_categories = [
-                {
-                    "key": "лето",
-                    "title": "Лето",
-                    "planned": plan_leto,
-                    "fact": fact_leto,
-                    "delta": fact_leto - plan_leto,
-                },
-                {
-                    "key": "зима",
-                    "title": "Зима",
-                    "planned": plan_zima,
-                    "fact": fact_zima,
-                    "delta": fact_zima - plan_zima,
-                },
-                {
-                    "key": "внерегламент",
-                    "title": "Внерегламент",
-                    "planned": plan_vnereglament,
-                    "fact": fact_vnereglament,
-                    "delta": fact_vnereglament - plan_vnereglament,
-                },
-            ]
-
-            # Для WorkBreakdownList
-            work_items = []
-            for desc in set(row["description"] for row in items_raw):
-                for cat in ["лето", "зима", "внерегламент"]:
-                    if cat == "внерегламент":
-                        planned = 0
-                        fact = sum(
-                            to_float(row["fact_amount_done"]) or 0.0
-                            for row in items_raw
-                            if normalize_string(row["smeta_code"], "") in CATEGORY_VNR_CODES and row["description"] == desc
-                        )
-                    else:
-                        planned = sum(
-                            to_float(row["planned_amount"]) or 0.0
-                            for row in items_raw
-                            if normalize_string(row["smeta_code"], "") == cat and row["description"] == desc
-                        )
-                        fact = sum(
-                            to_float(row["fact_amount_done"]) or 0.0
-                            for row in items_raw
-                            if normalize_string(row["smeta_code"], "") == cat and row["description"] == desc
-                        )
-                        if planned > 1 or fact > 1:
-                            # Найдём первую строку для desc и cat, чтобы взять month_start и smeta_code
-                            row_match = next((row for row in items_raw if row["description"] == desc and (
-                                (cat == "внерегламент" and normalize_string(row["smeta_code"], "") in CATEGORY_VNR_CODES) or
-                                (cat != "внерегламент" and normalize_string(row["smeta_code"], "") == cat)
-                            )), None)
-                            work_items.append({
-                                "month_start": row_match["month_start"] if row_match else None,
-                                "smeta": row_match["smeta_code"] if row_match else None,
-                                "work_name": desc,
-                                "category": cat,
-                                "description": desc,
-                                "planned_amount": planned,
-                                "fact_amount": fact,
-                                "delta": fact - planned,
-                            })
-
-            # last_updated
-            last_updated = _fetch_last_updated(conn)
-
-        # Возвращаем все агрегаты для фронта
-        return work_items, summary, last_updated, smeta_categories
+async def _plan_vs_fact_range_async(
+    months: list[date],
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]], datetime | None]:
+    last_updated = await watermark.current_async()
+    found, missing = _range_plan(months, last_updated)
+    if missing:
+        cols, rows = await _fetch_rows_async(RANGE_TOTALS_SQL, (missing,))
+        found.update(_build_range_totals(missing, rows, cols, last_updated))
+    return _range_result(months, found, last_updated)
 
 
+@single_flight(label="fetch_plan_vs_fact_range_async")
 @db_retry(
     retries=1,
     delay_sec=_DB_RETRY_DELAY_SEC,
     backoff=_DB_RETRY_BACKOFF,
     exceptions=_DB_RETRYABLE_ERRORS,
-    label="fetch_available_months",
+    label="fetch_plan_vs_fact_range_async",
 )
-def fetch_available_months(limit: int = 12) -> list[date]:
-    """Возвращает список месяцев, за которые есть данные."""
-    with get_connection() as conn:
-        return _fetch_dates(conn, AVAILABLE_MONTHS_SQL, (limit,))
-
+async def fetch_plan_vs_fact_range_async(
+    month_from: date,
+    month_to: date,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]], datetime | None]:
+    """
+    Итоги плана/факта по месяцам периода и по категориям за весь период.
+    Месяцы, уже посчитанные для дашборда или прошлого тренда, берутся из кеша;
+    остальные читаются одним сгруппированным запросом (`RANGE_TOTALS_SQL`).
+    Возвращает: (months, smeta_categories, last_updated)
+    """
 
+    return await _plan_vs_fact_range_async(_range_months(month_from, month_to))
+
+
+def _period_result(
+    period_months: list[date],
+    months: list[dict[str, Any]],
+    smeta_categories: list[dict[str, Any]],
+    last_updated: datetime | None,
+) -> dict[str, Any]:
+    planned = sum(category["planned"] for category in smeta_categories)
+    fact = sum(category["fact"] for category in smeta_categories)
+    return {
+        "period_start": period_months[0],
+        "period_end": period_months[-1],
+        "months_with_data": sum(1 for month in months if month["has_data"]),
+        "planned_amount": planned,
+        "fact_amount": fact,
+        "delta_amount": fact - planned,
+        "completion_pct": fact / planned if planned else None,
+        "smeta_categories": smeta_categories,
+        "last_updated": last_updated,
+    }
+
+
+@single_flight(label="fetch_period_rollup_async")
 @db_retry(
     retries=1,
     delay_sec=_DB_RETRY_DELAY_SEC,
     backoff=_DB_RETRY_BACKOFF,
     exceptions=_DB_RETRYABLE_ERRORS,
-    label="fetch_available_days",
+    label="fetch_period_rollup_async",
 )
-def fetch_available_days() -> list[date]:
-    """Возвращает список дат текущего месяца (через билдер), по которым есть фактические данные."""
-    with get_connection() as conn:
-        sql, params = (
-            FactQueryBuilder()
-            .distinct()
-            .select("date_done::date AS work_date")
-            .current_month()
-            .status()
-            .order_by("work_date DESC")
-            .build()
-        )
-        return _fetch_dates(conn, sql, params)
+async def fetch_period_rollup_async(period_start: date | None = None) -> dict[str, Any]:
+    """Накопительные план/факт/отклонение по категориям с начала периода до текущего месяца.
 
+    По умолчанию период — контракт (`CONTRACT_PERIOD_START`); для YTD передаётся
+    1 января. Складывается из итогов месяцев (`_month_totals_cache`): после
+    загрузки из БД перечитывается только текущий месяц.
+    """
+
+    period_months = _period_months(period_start)
+    months, smeta_categories, last_updated = await _plan_vs_fact_range_async(period_months)
+    return _period_result(period_months, months, smeta_categories, last_updated)
 
+
+@single_flight(label="fetch_available_months_async")
 @db_retry(
     retries=1,
     delay_sec=_DB_RETRY_DELAY_SEC,
     backoff=_DB_RETRY_BACKOFF,
     exceptions=_DB_RETRYABLE_ERRORS,
-    label="fetch_daily_report",
+    label="fetch_available_months_async",
 )
-def fetch_daily_report(target_date: date) -> DailyReportResponse:
-    """Возвращает детализацию фактических работ за выбранный день, используя билдер."""
-    target_date = target_date or date.today()
+async def fetch_available_months_async(limit: int = 12) -> list[date]:
+    """Возвращает список месяцев, за которые есть данные."""
+    return await _fetch_dates_async(AVAILABLE_MONTHS_SQL, (limit,))
+
+
+def _available_days_query() -> tuple[str, tuple[object, ...]]:
+    return (
+        FactQueryBuilder()
+        .distinct()
+        .select("date_done::date AS work_date")
+        .current_month()
+        .status()
+        .order_by("work_date DESC")
+        .build()
+    )
 
-    with get_connection() as conn:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            sql, params = (
-                FactQueryBuilder()
-                .select(
-                    "COALESCE(smeta_code, '') AS smeta_code",
-                    "COALESCE(smeta_section, '') AS smeta_section",
-                    "COALESCE(description, '') AS description",
-                    "unit",
-                    "SUM(total_volume) AS total_volume",
-                    "SUM(total_amount) AS total_amount",
-                )
-                .date_equals(target_date)
-                .status()
-                .group_by("smeta_code", "smeta_section", "description", "unit")
-                .order_by("total_amount DESC NULLS LAST", "description")
-                .build()
-            )
-            cur.execute(sql, params)
-            rows = cur.fetchall() or []
 
-        last_updated = _fetch_last_updated(conn)
+@single_flight(label="fetch_available_days_async")
+@db_retry(
+    retries=1,
+    delay_sec=_DB_RETRY_DELAY_SEC,
+    backoff=_DB_RETRY_BACKOFF,
+    exceptions=_DB_RETRYABLE_ERRORS,
+    label="fetch_available_days_async",
+)
+async def fetch_available_days_async() -> list[date]:
+    """Возвращает список дат текущего месяца (через билдер), по которым есть фактические данные."""
+    return await _fetch_dates_async(*_available_days_query())
+
+
+def _daily_report_query(target_date: date) -> tuple[str, tuple[object, ...]]:
+    return (
+        FactQueryBuilder()
+        .select(
+            "COALESCE(smeta_code, '') AS smeta_code",
+            "COALESCE(smeta_section, '') AS smeta_section",
+            "COALESCE(description, '') AS description",
+            "unit",
+            "SUM(total_volume) AS total_volume",
+            "SUM(total_amount) AS total_amount",
+        )
+        .date_equals(target_date)
+        .status()
+        .group_by("smeta_code", "smeta_section", "description", "unit")
+        .order_by("total_amount DESC NULLS LAST", "description")
+        .build()
+    )
+
 
+def _build_daily_report(
+    target_date: date,
+    rows: Iterable[Sequence[Any]],
+    last_updated: datetime | None,
+    cols: _ColumnIndex = _DICT_ROWS,
+) -> DailyReportResponse:
+    i_smeta, i_section = cols["smeta_code"], cols["smeta_section"]
+    i_description, i_unit = cols["description"], cols["unit"]
+    i_volume, i_amount = cols["total_volume"], cols["total_amount"]
     items: list[DailyReportItem] = []
     for row in rows:
         items.append(
             DailyReportItem(
-                smeta=normalize_string(row.get("smeta_code")) or None,
-                work_type=normalize_string(row.get("smeta_section")) or None,
-                description=normalize_string(row.get("description"), default="Без названия"),
-                unit=normalize_string(row.get("unit")) or None,
-                total_volume=to_float(row.get("total_volume")),
-                total_amount=to_float(row.get("total_amount")),
+                smeta=normalize_string(row[i_smeta]) or None,
+                work_type=normalize_string(row[i_section]) or None,
+                description=normalize_string(row[i_description], default="Без названия"),
+                unit=normalize_string(row[i_unit]) or None,
+                total_volume=to_float(row[i_volume]),
+                total_amount=to_float(row[i_amount]),
             )
         )
 
@@ -618,12 +1380,107 @@ def fetch_daily_report(target_date: date) -> DailyReportResponse:
     )
 
 
+@single_flight(label="fetch_daily_report_async")
+@db_retry(
+    retries=1,
+    delay_sec=_DB_RETRY_DELAY_SEC,
+    backoff=_DB_RETRY_BACKOFF,
+    exceptions=_DB_RETRYABLE_ERRORS,
+    label="fetch_daily_report_async",
+)
+async def fetch_daily_report_async(target_date: date) -> DailyReportResponse:
+    """Возвращает детализацию фактических работ за выбранный день, используя билдер.
+
+    Ответ кешируется по дню (`_daily_report_cache`): дни старше окна
+    DAILY_REVENUE_REOPEN_DAYS живут долго, последние дни (их ещё может изменить
+    загрузка) перечитываются после каждой загрузки и не реже DAILY_REPORT_TODAY_TTL_SEC.
+    """
+    target_date = target_date or date.today()
+    closed = _is_closed_day(target_date)
+    last_updated = await watermark.current_async()
+    cached = _daily_report_cache.get(target_date, last_updated, closed=closed)
+    if cached is not None:
+        return cached
+
+    cols, rows = await _fetch_rows_async(*_daily_report_query(target_date))
+    report = _build_daily_report(target_date, rows, last_updated, cols)
+    _daily_report_cache.put(target_date, report, last_updated, closed=closed)
+    return report
+
+
 def _fetch_last_updated(conn) -> datetime | None:
     """Возвращает максимальный loaded_at из агрегаций или None."""
 
     with conn.cursor() as cur:
-        cur.execute(LAST_UPDATED_SQL)
+        execute_prepared(cur, LAST_UPDATED_SQL)
         res = cur.fetchone()
         if not res:
             return None
         return res[0]
+
+
+@db_retry(
+    retries=1,
+    delay_sec=_DB_RETRY_DELAY_SEC,
+    backoff=_DB_RETRY_BACKOFF,
+    exceptions=_DB_RETRYABLE_ERRORS,
+    label="fetch_last_updated",
+)
+def fetch_last_updated() -> datetime | None:
+    """Читает водяной знак загрузки из основной БД (используется `watermark`).
+
+    Если задан DB_REPLICA_DSN, заодно сверяет с ним водяной знак реплики:
+    пока реплика не догнала загрузку, читающие запросы идут в основную БД,
+    иначе под новым водяным знаком в кеши попали бы старые данные.
+    """
+
+    with get_connection() as conn:
+        last_updated = _fetch_last_updated(conn)
+    if replica_configured():
+        _sync_replica(last_updated)
+    return last_updated
+
+
+def _sync_replica(last_updated: datetime | None) -> None:
+    try:
+        with get_replica_connection() as conn:
+            replica_updated = _fetch_last_updated(conn)
+    except _DB_RETRYABLE_ERRORS as exc:
+        logger.warning("Не удалось прочитать водяной знак реплики: %s", exc)
+        set_replica_in_sync(False)
+        return
+    set_replica_in_sync(
+        last_updated is None or (replica_updated is not None and replica_updated >= last_updated)
+    )
+
+
+_CACHES = (
+    _month_cache,
+    _month_totals_cache,
+    _breakdown_cache,
+    _daily_report_cache,
+    _contract_cache,
+    _daily_series_cache,
+)
+
+
+def cache_stats() -> list[dict[str, Any]]:
+    """Статистика внутрипроцессных кешей (размер, попадания, уровни)."""
+
+    return [cache.stats() for cache in _CACHES]
+
+
+def clear_caches() -> None:
+    """Сбрасывает все внутрипроцессные кеши (следующие запросы идут в БД)."""
+
+    for cache in _CACHES:
+        cache.invalidate()
+
+
+# Единый источник водяного знака для запросов и инвалидации кешей;
+# фоновый опрос запускается в lifespan приложения (`app/main.py`).
+watermark = WatermarkPoller(
+    fetch_last_updated,
+    interval_sec=get_settings().watermark_poll_interval_sec,
+)
+watermark.on_change(_refresh_contract_progress)
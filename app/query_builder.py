@@ -7,9 +7,14 @@ from __future__ import annotations
 
 Билдер НЕ претендует на полноту ORM. Он генерирует простые SQL-строки
 с параметрами (placeholders %s) для использования с psycopg2.
+
+Фильтры по дате строятся как полуоткрытые диапазоны по самому `date_done`
+(`date_done >= начало AND date_done < конец`), без приведения колонки к date:
+так Postgres может использовать индексы из `migrations/001_fact_with_money_indexes.sql`.
 """
 
-from typing import List, Tuple
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
 
 
 class FactQueryBuilder:
@@ -39,6 +44,8 @@ class FactQueryBuilder:
         self._having: List[str] = []
         self._distinct: bool = False
         self._params: List[object] = []
+        # Имена вызванных фильтров — для подписи запроса (см. `shape`).
+        self._filters: List[str] = []
 
     # ---- Select ----
     def select(self, *columns: str) -> "FactQueryBuilder":
@@ -51,37 +58,49 @@ class FactQueryBuilder:
 
     # ---- Where helpers ----
     def month_start(self, month_start) -> "FactQueryBuilder":
+        self._filters.append("month_start")
         self._where.append("month_start = %s")
         self._params.append(month_start)
         return self
 
     def date_equals(self, day) -> "FactQueryBuilder":
-        self._where.append("date_done::date = %s")
-        self._params.append(day)
-        return self
+        return self.date_range(day, day + timedelta(days=1))
 
     def current_month(self) -> "FactQueryBuilder":
-        self._where.append("date_trunc('month', date_done) = date_trunc('month', CURRENT_DATE)")
+        self._filters.append("current_month")
+        self._where.append("date_done >= date_trunc('month', CURRENT_DATE)::date")
+        self._where.append("date_done < (date_trunc('month', CURRENT_DATE) + interval '1 month')::date")
         return self
 
     def date_range(self, start, end) -> "FactQueryBuilder":
-        self._where.append("date_done::date >= %s")
-        self._where.append("date_done::date < %s")
+        """Дни с `start` включительно по `end` не включительно."""
+        self._filters.append("date_range")
+        self._where.append("date_done >= %s")
+        self._where.append("date_done < %s")
         self._params.extend([start, end])
         return self
 
     def status(self, value: str = "Рассмотрено") -> "FactQueryBuilder":
+        self._filters.append("status")
         self._where.append("status = %s")
         self._params.append(value)
         return self
 
     def ilike_description(self, pattern: str) -> "FactQueryBuilder":
+        self._filters.append("ilike_description")
         self._where.append("COALESCE(description::text, '') ILIKE %s")
         self._params.append(pattern)
         return self
 
+    def ilike_any_description(self, patterns) -> "FactQueryBuilder":
+        self._filters.append("ilike_any_description")
+        self._where.append("COALESCE(description::text, '') ILIKE ANY(%s)")
+        self._params.append(list(patterns))
+        return self
+
     def raw_where(self, clause: str) -> "FactQueryBuilder":
         if clause:
+            self._filters.append("raw_where")
             self._where.append(clause)
         return self
 
@@ -98,6 +117,14 @@ class FactQueryBuilder:
         self._order_by.extend([c for c in cols if c])
         return self
 
+    # ---- Shape ----
+    def shape(self) -> str:
+        """Подпись запроса без значений: фильтры и группировка, напр. `fact[month_start,status]/work_date`."""
+        shape = f"fact[{','.join(self._filters)}]"
+        if self._group_by:
+            shape += "/" + ",".join(self._group_by)
+        return f"distinct:{shape}" if self._distinct else shape
+
     # ---- Build ----
     def build(self) -> Tuple[str, Tuple[object, ...]]:
         if not self._select:
@@ -122,7 +149,17 @@ class FactQueryBuilder:
             sql_parts.append("ORDER BY " + ", ".join(self._order_by))
 
         final_sql = "\n".join(sql_parts) + ";"
+        _shapes[final_sql] = self.shape()
         return final_sql, tuple(self._params)
 
 
-__all__ = ["FactQueryBuilder"]
+# SQL -> подпись; текстов у билдера конечное число (значения идут параметрами).
+_shapes: Dict[str, str] = {}
+
+
+def shape_of(sql: str) -> Optional[str]:
+    """Подпись цепочки билдера, построившей `sql`, или None для прочих запросов."""
+    return _shapes.get(sql)
+
+
+__all__ = ["FactQueryBuilder", "shape_of"]
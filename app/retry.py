@@ -7,6 +7,10 @@ import time
 from typing import Any, Callable, TypeVar
 
 from psycopg2 import InterfaceError, OperationalError
+from psycopg2.errors import QueryCanceled
+
+from .deadline import remaining as deadline_remaining
+from .metrics import observe_retries, operation_label
 
 T = TypeVar("T")
 
@@ -35,21 +39,34 @@ def db_retry(
         delay_sec: базовая задержка перед повторной попыткой.
         backoff: множитель задержки (если >1.0, задержка растёт экспоненциально).
         exceptions: кортеж исключений, при которых выполняется повтор.
-        label: метка операции для логов (по умолчанию имя функции).
+        label: метка операции для логов и метрик запросов (по умолчанию имя функции).
         logger_: кастомный логгер (если None используется модульный).
     Возвращает:
         Обёрнутую функцию с логикой повторных попыток.
+
+    Если у запроса к API есть дедлайн (см. `deadline.py`) и его остатка не хватает
+    даже на задержку перед повтором, ошибка пробрасывается без повтора. Запрос,
+    отменённый по statement_timeout (`QueryCanceled` — подкласс OperationalError),
+    не повторяется никогда: повтор упёрся бы в тот же таймаут.
     """
 
     log = logger_ or logger
 
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
         is_async = asyncio.iscoroutinefunction(func)
+        operation = label or func.__name__
+
+        def _budget_spent(current_delay: float, exc: Exception) -> bool:
+            left = deadline_remaining()
+            if left is None or left > current_delay:
+                return False
+            log.warning("Бюджет времени запроса исчерпан, %s не повторяется: %s", operation, exc)
+            return True
 
         def _log_retry(attempt: int, current_delay: float, total: int, exc: Exception) -> None:
             log.warning(
                 "Ошибка при выполнении %s, повтор через %.2f с (попытка %d/%d): %s",
-                label or func.__name__,
+                operation,
                 current_delay,
                 attempt,
                 total,
@@ -65,9 +82,13 @@ def db_retry(
                 total_attempts = retries + 1
                 while True:
                     try:
-                        return await func(*args, **kwargs)
+                        with operation_label(operation):
+                            result = await func(*args, **kwargs)
+                        observe_retries(operation, attempt)
+                        return result
                     except exceptions as exc:  # noqa: BLE001
-                        if attempt >= retries:
+                        if attempt >= retries or isinstance(exc, QueryCanceled) or _budget_spent(current_delay, exc):
+                            observe_retries(operation, attempt)
                             raise
                         attempt += 1
                         _log_retry(attempt, current_delay, total_attempts, exc)
@@ -83,9 +104,13 @@ def db_retry(
             total_attempts = retries + 1
             while True:
                 try:
-                    return func(*args, **kwargs)
+                    with operation_label(operation):
+                        result = func(*args, **kwargs)
+                    observe_retries(operation, attempt)
+                    return result
                 except exceptions as exc:  # noqa: BLE001
-                    if attempt >= retries:
+                    if attempt >= retries or isinstance(exc, QueryCanceled) or _budget_spent(current_delay, exc):
+                        observe_retries(operation, attempt)
                         raise
                     attempt += 1
                     _log_retry(attempt, current_delay, total_attempts, exc)
@@ -1,23 +1,42 @@
 from __future__ import annotations
 
 from datetime import date
-from typing import Annotated
+from typing import Annotated, AsyncIterator
 
-from fastapi import APIRouter, Query, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import Response
 
-from ..models import DashboardResponse
-from ..visit_logger import VisitLogRequest, log_dashboard_visit
+from ..config import get_settings
+from ..deadline import deadline_scope
+from ..models import DashboardPeriodResponse, DashboardRangeResponse, DashboardResponse
+from ..visit_logger import VisitLogRequest, log_dashboard_visit_async
 from ..pdf import build_dashboard_pdf
 from ..queries import (
-    fetch_available_days,
-    fetch_available_months,
-    fetch_daily_report,
-    fetch_plan_vs_fact_for_month,
-    fetch_work_daily_breakdown,
+    fetch_available_days_async,
+    fetch_available_months_async,
+    fetch_daily_report_async,
+    fetch_period_rollup_async,
+    fetch_plan_vs_fact_for_month_async,
+    fetch_plan_vs_fact_range_async,
+    fetch_work_daily_breakdown_async,
+    fetch_works_daily_breakdown_async,
+    validate_period,
+    validate_range,
 )
 
-router = APIRouter()
+
+async def request_deadline() -> AsyncIterator[None]:
+    """Дедлайн эндпоинта: запросы к БД внутри получают остаток REQUEST_TIMEOUT_SEC."""
+
+    with deadline_scope(get_settings().request_timeout_sec):
+        yield
+
+
+router = APIRouter(dependencies=[Depends(request_deadline)])
+
+# Сколько работ можно запросить одним вызовом /dashboard/work-breakdown/batch
+MAX_BATCH_WORKS = 100
 
 MonthQuery = Annotated[
     date,
@@ -31,13 +50,13 @@ DayQuery = Annotated[
 
 
 @router.get("/dashboard", response_model=DashboardResponse)
-def get_dashboard(month: MonthQuery, request: Request) -> DashboardResponse:
+async def get_dashboard(month: MonthQuery, request: Request) -> DashboardResponse:
     """Основной эндпоинт для дашборда."""
 
 
-    work_items, summary, last_updated, smeta_categories = fetch_plan_vs_fact_for_month(month)
+    work_items, summary, last_updated, smeta_categories = await fetch_plan_vs_fact_for_month_async(month)
 
-    log_dashboard_visit(request=request, endpoint=str(request.url.path))
+    await log_dashboard_visit_async(request=request, endpoint=str(request.url.path))
 
     return {
         "month": month,
@@ -49,43 +68,91 @@ def get_dashboard(month: MonthQuery, request: Request) -> DashboardResponse:
     }
 
 
+@router.get("/dashboard/range", response_model=DashboardRangeResponse)
+async def get_dashboard_range(
+    request: Request,
+    month_from: Annotated[date, Query(..., alias="from", description="Первый месяц периода, напр. 2025-01-01")],
+    month_to: Annotated[date, Query(..., alias="to", description="Последний месяц периода, напр. 2025-12-01")],
+) -> DashboardRangeResponse:
+    """Итоги плана/факта по месяцам периода (для графика тренда)."""
+
+    try:
+        validate_range(month_from, month_to)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+    months, smeta_categories, last_updated = await fetch_plan_vs_fact_range_async(month_from, month_to)
+
+    await log_dashboard_visit_async(request=request, endpoint=str(request.url.path))
+
+    return {
+        "month_from": month_from.replace(day=1),
+        "month_to": month_to.replace(day=1),
+        "last_updated": last_updated,
+        "months": months,
+        "smeta_categories": smeta_categories,
+        "has_data": any(month["has_data"] for month in months),
+    }
+
+
+@router.get("/dashboard/period", response_model=DashboardPeriodResponse)
+async def get_dashboard_period(
+    period_start: Annotated[
+        date | None,
+        Query(
+            alias="from",
+            description="Начало периода, не раньше начала контракта (по умолчанию — оно), напр. 2025-01-01",
+        ),
+    ] = None,
+) -> DashboardPeriodResponse:
+    """Накопительные итоги плана/факта с начала периода по текущий месяц."""
+
+    try:
+        validate_period(period_start)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+    return await fetch_period_rollup_async(period_start)
+
+
 @router.get("/dashboard/pdf")
-def get_dashboard_pdf(month: MonthQuery, request: Request) -> Response:
+async def get_dashboard_pdf(month: MonthQuery, request: Request) -> Response:
     """Отдаёт тот же отчёт, но сразу в формате PDF."""
 
-    items, summary, last_updated = fetch_plan_vs_fact_for_month(month)
-    log_dashboard_visit(request=request, endpoint=str(request.url.path))
-    pdf_bytes = build_dashboard_pdf(month, last_updated, items, summary)
+    items, summary, last_updated, _ = await fetch_plan_vs_fact_for_month_async(month)
+    await log_dashboard_visit_async(request=request, endpoint=str(request.url.path))
+    # Сборка PDF — CPU-работа, выносим её из event loop.
+    pdf_bytes = await run_in_threadpool(build_dashboard_pdf, month, last_updated, items, summary)
     file_name = f"mad-podolsk-otchet-{month.strftime('%Y-%m')}.pdf"
     headers = {"Content-Disposition": f'attachment; filename="{file_name}"'}
     return Response(content=pdf_bytes, media_type="application/pdf", headers=headers)
 
 
 @router.get("/dashboard/months")
-def get_available_months(limit: Annotated[int | None, Query(gt=0, le=24)] = 12) -> dict[str, list[date]]:
+async def get_available_months(limit: Annotated[int | None, Query(gt=0, le=24)] = 12) -> dict[str, list[date]]:
     """Возвращает список месяцев, для которых есть данные."""
 
-    months = fetch_available_months(limit=limit or 12)
+    months = await fetch_available_months_async(limit=limit or 12)
     return {"months": months}
 
 
 @router.get("/dashboard/days")
-def get_available_days() -> dict[str, list[date]]:
+async def get_available_days() -> dict[str, list[date]]:
     """Возвращает дни текущего месяца, для которых есть данные факта."""
 
-    days = fetch_available_days()
+    days = await fetch_available_days_async()
     return {"days": days}
 
 
 @router.post("/dashboard/visit", status_code=status.HTTP_204_NO_CONTENT)
-def log_dashboard_visit_endpoint(payload: VisitLogRequest, request: Request) -> Response:
+async def log_dashboard_visit_endpoint(payload: VisitLogRequest, request: Request) -> Response:
     """Записывает единичный визит пользователя на дашборд.
 
     Запрос должен отправляться фронтендом один раз за визит с передачей всех
     клиентских метрик, чтобы в базе появлялась ровно одна запись.
     """
 
-    log_dashboard_visit(
+    await log_dashboard_visit_async(
         request=request,
         endpoint=payload.endpoint,
         user_id=payload.user_id,
@@ -97,20 +164,40 @@ def log_dashboard_visit_endpoint(payload: VisitLogRequest, request: Request) ->
 
 
 @router.get("/dashboard/daily")
-def get_daily_report(day: DayQuery, request: Request):
+async def get_daily_report(day: DayQuery, request: Request):
     """Возвращает детализацию принятых работ за конкретный день."""
 
-    log_dashboard_visit(request=request, endpoint=str(request.url.path))
-    return fetch_daily_report(day)
+    await log_dashboard_visit_async(request=request, endpoint=str(request.url.path))
+    return await fetch_daily_report_async(day)
 
 
 @router.get("/dashboard/work-breakdown")
-def get_work_breakdown(month: MonthQuery, work: Annotated[str, Query(..., description="Название вида работы")]) -> list[dict]:
+async def get_work_breakdown(month: MonthQuery, work: Annotated[str, Query(..., description="Название вида работы")]) -> list[dict]:
     """Возвращает подневную расшифровку объёмов (`total_volume`) по указанной работе за месяц.
 
     Возвращает массив объектов с полями `date`, `amount` и `unit`.
     """
-    rows = fetch_work_daily_breakdown(month, work)
+    rows = await fetch_work_daily_breakdown_async(month, work)
+    return _work_breakdown_rows(rows)
+
+
+@router.get("/dashboard/work-breakdown/batch")
+async def get_work_breakdown_batch(
+    month: MonthQuery,
+    work: Annotated[
+        list[str],
+        Query(..., max_length=MAX_BATCH_WORKS, description="Названия видов работ (параметр повторяется)"),
+    ],
+) -> dict[str, list[dict]]:
+    """Подневные расшифровки сразу для нескольких работ за месяц (один запрос к БД).
+
+    Возвращает объект «работа -> массив» в формате `/dashboard/work-breakdown`.
+    """
+    series = await fetch_works_daily_breakdown_async(month, tuple(work))
+    return {name: _work_breakdown_rows(rows) for name, rows in series.items()}
+
+
+def _work_breakdown_rows(rows) -> list[dict]:
     return [
         {
             "date": r.date.isoformat(),
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+"""Объединение одинаковых одновременных вызовов (single-flight).
+
+Если несколько потоков (или корутин) одновременно вызывают функцию с одинаковыми
+аргументами, выполняется только первый вызов, остальные ждут и получают
+тот же результат (или то же исключение). Это защищает пул соединений от
+лавины одинаковых запросов после загрузки данных или деплоя.
+"""
+
+import asyncio
+import functools
+import logging
+from threading import Event, Lock
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self) -> None:
+        self.done = Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Группа вызовов, объединяемых по ключу."""
+
+    def __init__(self, name: str = "single_flight") -> None:
+        self.name = name
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = Lock()
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            if call.waiters:
+                logger.debug("%s: результат %r разделён с %d вызовами", self.name, key, call.waiters)
+            call.done.set()
+        return call.result
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "in_flight": len(self._calls),
+                "executed": self.executed,
+                "shared": self.shared,
+            }
+
+
+class AsyncSingleFlight:
+    """Асинхронный вариант: одновременные корутины ждут одну задачу.
+
+    Вычисление запускается отдельной задачей, поэтому отмена одного из
+    ожидающих (например, клиент закрыл соединение) не отменяет его для остальных.
+    """
+
+    def __init__(self, name: str = "single_flight") -> None:
+        self.name = name
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self.executed = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self.executed += 1
+
+            def _forget(_: asyncio.Future) -> None:
+                if self._calls.get(key) is task:
+                    del self._calls[key]
+
+            task.add_done_callback(_forget)
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "in_flight": len(self._calls),
+            "executed": self.executed,
+            "shared": self.shared,
+        }
+
+
+def single_flight(*, label: str | None = None) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Декоратор: одновременные вызовы с равными аргументами выполняются один раз.
+
+    Typical usage:
+        @single_flight(label="fetch_available_months")
+        @db_retry(...)
+        def fetch_available_months(limit: int = 12) -> list[date]:
+            ...
+
+    Аргументы функции должны быть хешируемыми. Группа доступна как
+    атрибут `single_flight` обёрнутой функции (для статистики).
+    """
+
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        if asyncio.iscoroutinefunction(func):
+            async_group = AsyncSingleFlight(label or func.__name__)
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                key = (args, tuple(sorted(kwargs.items())))
+                return await async_group.do(key, lambda: func(*args, **kwargs))
+
+            async_wrapper.single_flight = async_group  # type: ignore[attr-defined]
+            return async_wrapper  # type: ignore[return-value]
+
+        group = SingleFlight(label or func.__name__)
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> T:
+            key = (args, tuple(sorted(kwargs.items())))
+            return group.do(key, lambda: func(*args, **kwargs))
+
+        wrapper.single_flight = group  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
+
+
+__all__ = ["AsyncSingleFlight", "SingleFlight", "single_flight"]
@@ -0,0 +1,130 @@
+"""Журнал медленных запросов (включается `SLOW_QUERY_THRESHOLD_MS > 0`).
+
+Запрос через `execute_prepared` дольше порога один раз пишется в лог
+и в кольцевой буфер последних `SLOW_QUERY_LOG_SIZE` записей (`/health/slow-queries`):
+метка операции `db_retry`, отпечаток SQL, хеши параметров, число строк,
+ожидание соединения из пула и время выполнения.
+
+Значения параметров не сохраняются — только их хеши (`param_hash`): по ним
+видно, что медленными оказываются одни и те же месяц или работа, а проверить
+конкретное значение можно, посчитав его хеш.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+from collections import deque
+from contextvars import ContextVar, Token
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Sequence
+
+from .config import get_settings
+from .metrics import current_operation
+from .query_builder import shape_of
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+# Сколько символов нормализованного SQL хранить в записи.
+_SQL_PREVIEW_CHARS = 500
+
+_pool_wait: ContextVar[float | None] = ContextVar("db_pool_wait_sec", default=None)
+
+
+def set_pool_wait(seconds: float) -> Token:
+    """Запоминает ожидание соединения для запросов внутри `get_connection()`."""
+
+    return _pool_wait.set(seconds)
+
+
+def reset_pool_wait(token: Token) -> None:
+    _pool_wait.reset(token)
+
+
+def normalize_sql(sql: str) -> str:
+    return _WHITESPACE_RE.sub(" ", sql).strip().rstrip(";")
+
+
+def fingerprint(sql: str) -> str:
+    """Подпись цепочки `FactQueryBuilder` или короткий хеш нормализованного SQL."""
+
+    return shape_of(sql) or "sql:" + hashlib.sha1(normalize_sql(sql).encode("utf-8")).hexdigest()[:12]
+
+
+def param_hash(value: Any) -> str:
+    return hashlib.sha256(repr(value).encode("utf-8")).hexdigest()[:12]
+
+
+class SlowQueryLog:
+    """Потокобезопасный кольцевой буфер медленных запросов."""
+
+    def __init__(self, *, threshold_ms: float, maxsize: int) -> None:
+        self.threshold_ms = threshold_ms
+        self._entries: deque[dict[str, Any]] = deque(maxlen=max(1, maxsize))
+        self._lock = Lock()
+        self.recorded = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+
+    def observe(self, sql: str, params: Sequence[Any] | None, duration_sec: float, rows: int | None) -> None:
+        """Сохраняет запрос, если он медленнее порога."""
+
+        exec_ms = duration_sec * 1000
+        if not self.enabled or exec_ms < self.threshold_ms:
+            return
+
+        pool_wait = _pool_wait.get()
+        entry = {
+            "recorded_at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "label": current_operation(),
+            "fingerprint": fingerprint(sql),
+            "sql": normalize_sql(sql)[:_SQL_PREVIEW_CHARS],
+            "params": [param_hash(value) for value in params or ()],
+            "rows": rows if rows is not None and rows >= 0 else None,
+            "pool_wait_ms": round(pool_wait * 1000, 3) if pool_wait is not None else None,
+            "exec_ms": round(exec_ms, 3),
+        }
+        with self._lock:
+            self._entries.append(entry)
+            self.recorded += 1
+        logger.warning(
+            "Медленный запрос %s (%s): %.1f мс, строк %s, ожидание пула %s мс, параметры %s",
+            entry["label"],
+            entry["fingerprint"],
+            exec_ms,
+            entry["rows"],
+            entry["pool_wait_ms"],
+            entry["params"],
+        )
+
+    def entries(self) -> list[dict[str, Any]]:
+        """Записи буфера, новые первыми."""
+
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+slow_queries = SlowQueryLog(
+    threshold_ms=get_settings().slow_query_threshold_ms,
+    maxsize=get_settings().slow_query_log_size,
+)
+
+
+__all__ = [
+    "SlowQueryLog",
+    "fingerprint",
+    "normalize_sql",
+    "param_hash",
+    "reset_pool_wait",
+    "set_pool_wait",
+    "slow_queries",
+]
@@ -28,6 +28,27 @@ def to_float(value: Any) -> float | None:
         return None
 
 
+def to_date(value: Any) -> date | None:
+    """Безопасное преобразование значения в date.
+
+    Args:
+        value: Значение для преобразования (None, date, datetime, строка ISO).
+
+    Returns:
+        date или None, если преобразование невозможно.
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
 def normalize_string(value: Any, default: str = "") -> str:
     """Нормализует строку: убирает пробелы, возвращает значение по умолчанию для пустых.
     
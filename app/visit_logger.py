@@ -1,14 +1,14 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Iterable
+from typing import Any
 
 from fastapi import Request
 from pydantic import BaseModel, Field, field_validator
 from psycopg2 import IntegrityError
 
 from .constants import TZ_MOSCOW_NAME
-from .db import get_connection
+from .db import get_async_connection, get_connection
 
 logger = logging.getLogger(__name__)
 
@@ -200,18 +200,30 @@ def _ensure_unique_index(cur) -> None:
         _unique_index_created = True
 
 
-def log_dashboard_visit(
+async def _ensure_unique_index_async(cur) -> None:
+    global _unique_index_created
+    if _unique_index_created:
+        return
+
+    try:
+        await cur.execute(CREATE_UNIQUE_SESSION_INDEX_SQL)
+    except Exception as exc:  # pragma: no cover - защита от неожиданных ошибок
+        logger.warning(
+            "Не удалось создать уникальный индекс по user_id и session_id: %s", exc
+        )
+    else:
+        _unique_index_created = True
+
+
+def _build_visit_values(
     *,
     request: Request,
     endpoint: str,
-    user_id: str | None = None,
-    session_id: str | None = None,
-    session_duration_sec: int | None = None,
-) -> None:
-    """Фиксирует посещение дашборда в базе данных.
-    
-    Асинхронные ошибки БД игнорируются чтобы не повлиять на основной запрос.
-    """
+    user_id: str | None,
+    session_id: str | None,
+    session_duration_sec: int | None,
+) -> tuple[Any, ...]:
+    """Собирает параметры UPSERT_VISIT_SQL из запроса и явно переданных значений."""
 
     client_ip = _get_client_ip(request)
     user_agent = request.headers.get("user-agent")
@@ -224,7 +236,7 @@ def log_dashboard_visit(
     )
     device_type, browser, os = _parse_user_agent(user_agent)
 
-    values: Iterable[Any] = (
+    return (
         endpoint,
         client_ip,
         user_agent,
@@ -236,6 +248,29 @@ def log_dashboard_visit(
         os,
     )
 
+
+def log_dashboard_visit(
+    *,
+    request: Request,
+    endpoint: str,
+    user_id: str | None = None,
+    session_id: str | None = None,
+    session_duration_sec: int | None = None,
+) -> None:
+    """Фиксирует посещение дашборда в базе данных.
+    
+    Асинхронные ошибки БД игнорируются чтобы не повлиять на основной запрос.
+    """
+
+    values = _build_visit_values(
+        request=request,
+        endpoint=endpoint,
+        user_id=user_id,
+        session_id=session_id,
+        session_duration_sec=session_duration_sec,
+    )
+    user_id, session_id = values[3], values[4]
+
     try:
         with get_connection() as conn, conn.cursor() as cur:
             _ensure_unique_index(cur)
@@ -257,3 +292,40 @@ def log_dashboard_visit(
         logger.warning(
             "Не удалось записать посещение дашборда: %s", exc, exc_info=True
         )
+
+
+async def log_dashboard_visit_async(
+    *,
+    request: Request,
+    endpoint: str,
+    user_id: str | None = None,
+    session_id: str | None = None,
+    session_duration_sec: int | None = None,
+) -> None:
+    """Асинхронный вариант `log_dashboard_visit` (соединения aiopg в autocommit)."""
+
+    values = _build_visit_values(
+        request=request,
+        endpoint=endpoint,
+        user_id=user_id,
+        session_id=session_id,
+        session_duration_sec=session_duration_sec,
+    )
+    user_id, session_id = values[3], values[4]
+
+    try:
+        async with get_async_connection() as conn, conn.cursor() as cur:
+            await _ensure_unique_index_async(cur)
+            await cur.execute(UPSERT_VISIT_SQL, values)
+    except IntegrityError as exc:
+        logger.debug(
+            "Duplicate visit record для %s (user_id=%s, session_id=%s): %s. Это нормально.",
+            endpoint,
+            user_id,
+            session_id,
+            exc,
+        )
+    except Exception as exc:  # pragma: no cover - запись не должна падать приложение
+        logger.warning(
+            "Не удалось записать посещение дашборда: %s", exc, exc_info=True
+        )
@@ -0,0 +1,109 @@
+"""Общий водяной знак загрузки данных (максимальный `loaded_at` по агрегатам).
+
+Значение опрашивается фоновой задачей из lifespan приложения, а запросы
+читают его из памяти. От него же инвалидируются кеши (см. `cache.py`).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from threading import Lock
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class WatermarkPoller:
+    """Хранит последний водяной знак и периодически обновляет его из БД.
+
+    Если фоновый опрос не запущен (скрипты, `interval_sec <= 0`) или ещё
+    ни разу не завершился успешно, `current()` читает значение синхронно.
+
+    Подписчики `on_change()` вызываются после первого чтения и после каждой
+    смены значения — так тяжёлые агрегаты прогреваются вне запросов.
+    """
+
+    def __init__(self, fetch: Callable[[], datetime | None], *, interval_sec: float) -> None:
+        self._fetch = fetch
+        self.interval_sec = interval_sec
+        self._value: datetime | None = None
+        self._refreshed_at: float | None = None
+        self._lock = Lock()
+        self._task: asyncio.Task | None = None
+        self._listeners: list[Callable[[datetime | None], None]] = []
+
+    @property
+    def refreshed_at(self) -> float | None:
+        """Момент последнего успешного опроса (time.monotonic())."""
+
+        return self._refreshed_at
+
+    def refresh(self) -> datetime | None:
+        """Синхронно перечитывает водяной знак из БД."""
+
+        with self._lock:
+            value = self._fetch()
+            changed = self._refreshed_at is None or value != self._value
+            if self._refreshed_at is not None and changed:
+                logger.info("Водяной знак загрузки сменился: %s -> %s", self._value, value)
+            self._value = value
+            self._refreshed_at = time.monotonic()
+        if changed:
+            self._notify(value)
+        return value
+
+    def on_change(self, listener: Callable[[datetime | None], None]) -> None:
+        """Подписывает `listener(value)` на смену водяного знака."""
+
+        self._listeners.append(listener)
+
+    def _notify(self, value: datetime | None) -> None:
+        for listener in self._listeners:
+            try:
+                listener(value)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Обработчик смены водяного знака %r завершился ошибкой: %s", listener, exc)
+
+    def current(self) -> datetime | None:
+        """Возвращает водяной знак из памяти без обращения к БД."""
+
+        if self._task is None or self._refreshed_at is None:
+            return self.refresh()
+        return self._value
+
+    async def current_async(self) -> datetime | None:
+        """То же, что `current()`, но синхронное чтение уходит в поток."""
+
+        if self._task is None or self._refreshed_at is None:
+            return await asyncio.to_thread(self.refresh)
+        return self._value
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Не удалось обновить водяной знак загрузки: %s", exc)
+            await asyncio.sleep(self.interval_sec)
+
+    def start(self) -> None:
+        """Запускает фоновый опрос в текущем event loop."""
+
+        if self._task is None and self.interval_sec > 0:
+            self._task = asyncio.create_task(self._run(), name="watermark-poller")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+__all__ = ["WatermarkPoller"]
@@ -0,0 +1,95 @@
+"""Бенчмарк агрегации `fetch_plan_vs_fact_for_month_async` без БД.
+
+Генерирует синтетические строки `skpdi_plan_vs_fact_monthly` и замеряет
+время `_PlanFactAggregator` (колоночный `MonthFrame`) на разных объёмах. При линейной
+сложности время на строку остаётся примерно постоянным.
+
+Строки сравниваются в двух формах: словари (как у RealDictCursor) и кортежи
+с индексом колонок (как у обычного курсора). Для каждой формы печатается
+также объём памяти самих строк по tracemalloc.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.bench_plan_vs_fact
+"""
+
+from __future__ import annotations
+
+import random
+import time
+import tracemalloc
+from datetime import date
+from decimal import Decimal
+
+from app.queries import _DICT_ROWS, _PlanFactAggregator
+
+MONTH_START = date(2025, 6, 1)
+SMETA_CODES = ("лето", "зима", "внерегл_ч_1", "внерегл_ч_2")
+ROW_COUNTS = (1_000, 5_000, 25_000, 125_000)
+REPEATS = 5
+COLUMNS = ("month_start", "smeta_code", "description", "planned_amount", "fact_amount_done")
+TUPLE_COLS = {name: position for position, name in enumerate(COLUMNS)}
+
+
+def make_rows(count: int, *, seed: int = 42) -> list[tuple]:
+    """Строки в форме обычного курсора: ~1 уникальное описание на 5 строк."""
+
+    rng = random.Random(seed)
+    descriptions = [f"Работа №{i}" for i in range(max(1, count // 5))]
+    return [
+        (
+            MONTH_START,
+            rng.choice(SMETA_CODES),
+            rng.choice(descriptions),
+            Decimal(rng.randint(0, 500_000)) / 100,
+            Decimal(rng.randint(0, 500_000)) / 100,
+        )
+        for _ in range(count)
+    ]
+
+
+def as_dicts(rows: list[tuple]) -> list[dict]:
+    """Те же строки в форме RealDictCursor."""
+
+    return [dict(zip(COLUMNS, row)) for row in rows]
+
+
+def rows_memory(build) -> int:
+    tracemalloc.start()
+    rows = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+    return size
+
+
+def run_once(rows: list, cols) -> float:
+    started = time.perf_counter()
+    aggregator = _PlanFactAggregator()
+    aggregator.add_rows(rows, cols)
+    aggregator.work_items()
+    aggregator.summary(MONTH_START)
+    aggregator.smeta_categories()
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    print(
+        f"{'rows':>10} {'dict, ms':>10} {'tuple, ms':>10} "
+        f"{'dict, MiB':>10} {'tuple, MiB':>11}"
+    )
+    for count in ROW_COUNTS:
+        tuples = make_rows(count)
+        dicts = as_dicts(tuples)
+        dict_best = min(run_once(dicts, _DICT_ROWS) for _ in range(REPEATS))
+        tuple_best = min(run_once(tuples, TUPLE_COLS) for _ in range(REPEATS))
+        dict_mem = rows_memory(lambda: as_dicts(tuples))
+        tuple_mem = rows_memory(lambda: [tuple([*row]) for row in tuples])
+        print(
+            f"{count:>10} {dict_best * 1000:>10.2f} {tuple_best * 1000:>10.2f} "
+            f"{dict_mem / 2**20:>10.1f} {tuple_mem / 2**20:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Бенчмарк публичных выборок `app/queries.py` на синтетических данных 1×/10×/100×.
+
+Для каждого масштаба БД заполняется `benchmarks.synthetic_data` (таблицы
+пересоздаются!), затем каждая выборка вызывается `REPEATS` раз со сброшенными
+внутрипроцессными кешами — замеряется путь до БД, а не попадание в кеш.
+Выборки асинхронные: все замеры одного масштаба идут в одном event loop.
+
+Нужна одноразовая БД (DB_DSN, как у приложения). Запуск из корня репозитория:
+
+    DB_DSN=postgresql://.../mad_synthetic python -m benchmarks.bench_scale --recreate
+    DB_DSN=postgresql://.../mad_synthetic python -m benchmarks.bench_scale --recreate --scales 1 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date, timedelta
+from typing import Any, Awaitable, Callable
+
+from psycopg2 import connect
+
+from app.config import get_settings
+from app.db import close_async_pool
+from app.queries import (
+    clear_caches,
+    fetch_available_days_async,
+    fetch_available_months_async,
+    fetch_daily_report_async,
+    fetch_last_updated,
+    fetch_period_rollup_async,
+    fetch_plan_vs_fact_for_month_async,
+    fetch_plan_vs_fact_range_async,
+    fetch_work_daily_breakdown_async,
+    fetch_works_daily_breakdown_async,
+)
+
+from .synthetic_data import SCALES, seed
+
+REPEATS = 5
+WORK = "Работа №2"
+WORKS = tuple(f"Работа №{n}" for n in range(2, 22))
+
+
+def fetchers() -> dict[str, Callable[[], Awaitable[Any]]]:
+    """Выборки с параметрами, как их вызывают эндпоинты дашборда."""
+
+    month = date.today().replace(day=1)
+    previous_month = (month - timedelta(days=1)).replace(day=1)
+    year_start = date(month.year, 1, 1)
+    return {
+        # Водяной знак читается синхронно (в потоке опроса), здесь — так же.
+        "fetch_last_updated": lambda: asyncio.to_thread(fetch_last_updated),
+        "fetch_available_months": fetch_available_months_async,
+        "fetch_available_days": fetch_available_days_async,
+        "fetch_plan_vs_fact_for_month": lambda: fetch_plan_vs_fact_for_month_async(month),
+        "fetch_plan_vs_fact_for_month(prev)": lambda: fetch_plan_vs_fact_for_month_async(previous_month),
+        "fetch_plan_vs_fact_range": lambda: fetch_plan_vs_fact_range_async(year_start, month),
+        "fetch_period_rollup": fetch_period_rollup_async,
+        "fetch_daily_report": lambda: fetch_daily_report_async(date.today() - timedelta(days=1)),
+        "fetch_work_daily_breakdown": lambda: fetch_work_daily_breakdown_async(month, WORK),
+        "fetch_works_daily_breakdown": lambda: fetch_works_daily_breakdown_async(month, WORKS),
+    }
+
+
+async def measure(fetch: Callable[[], Awaitable[Any]]) -> list[float]:
+    timings: list[float] = []
+    for _ in range(REPEATS):
+        clear_caches()
+        started = time.perf_counter()
+        await fetch()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+async def measure_all() -> dict[str, list[float]]:
+    try:
+        return {name: await measure(fetch) for name, fetch in fetchers().items()}
+    finally:
+        # Пул aiopg привязан к event loop, а на каждый масштаб запускается новый.
+        await close_async_pool()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", choices=SCALES, default=list(SCALES))
+    parser.add_argument("--recreate", action="store_true", help="подтвердить удаление и пересоздание таблиц")
+    args = parser.parse_args()
+
+    dsn = get_settings().db_dsn
+    if not dsn:
+        raise SystemExit("DB_DSN не задан")
+    if not args.recreate:
+        raise SystemExit("Таблицы в DB_DSN будут удалены: добавьте --recreate, если это одноразовая БД")
+
+    results: dict[str, dict[int, list[float]]] = {}
+    for scale in args.scales:
+        conn = connect(dsn)
+        try:
+            started = time.perf_counter()
+            counts = seed(conn, scale)
+        finally:
+            conn.close()
+        print(
+            f"масштаб {scale}x: {counts['skpdi_fact_with_money']:,} строк факта, "
+            f"{counts['skpdi_plan_vs_fact_monthly']:,} строк плана/факта ({time.perf_counter() - started:.1f} с)"
+        )
+        for name, timings in asyncio.run(measure_all()).items():
+            results.setdefault(name, {})[scale] = timings
+
+    header = "".join(f" {f'{scale}x med, ms':>14} {f'{scale}x max':>9}" for scale in args.scales)
+    print(f"\n{'fetcher':<36}{header}")
+    for name, by_scale in results.items():
+        cells = "".join(
+            f" {statistics.median(timings):>14.1f} {max(timings):>9.1f}" for timings in by_scale.values()
+        )
+        print(f"{name:<36}{cells}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Бенчмарк пиковой памяти: `fetchall()` против серверного курсора.
+
+Для каждого объёма во временной таблице `skpdi_plan_vs_fact_monthly`
+(в схеме pg_temp она перекрывает настоящую только в этой сессии) создаются
+синтетические строки месяца, после чего `ITEMS_SQL` читается в
+`_PlanFactAggregator` обоими способами (`_stream_rows_async`, как у дашборда). Пик памяти Python замеряется
+через tracemalloc: при потоковом чтении он не должен расти с объёмом.
+
+Нужна доступная БД (переменная DB_DSN, как у приложения). Реальные таблицы
+не изменяются. Запуск из корня репозитория:
+
+    DB_DSN=postgresql://... python -m benchmarks.bench_stream_memory
+"""
+
+from __future__ import annotations
+
+import asyncio
+import tracemalloc
+from datetime import date
+
+import aiopg
+
+from app.config import get_settings
+from app.queries import ITEMS_SQL, _PlanFactAggregator, _stream_rows_async
+
+MONTH_START = date(2025, 6, 1)
+ROW_COUNTS = (10_000, 50_000, 250_000)
+DESCRIPTIONS = 500
+STREAM_BATCH_SIZE = 2_000
+
+SEED_SQL = """
+    DROP TABLE IF EXISTS pg_temp.skpdi_plan_vs_fact_monthly;
+    CREATE TEMP TABLE skpdi_plan_vs_fact_monthly AS
+    SELECT
+        %(month)s::date AS month_start,
+        (ARRAY['лето', 'зима', 'внерегл_ч_1', 'внерегл_ч_2'])[1 + i %% 4] AS smeta_code,
+        'Работа №' || (i %% %(descriptions)s) AS description,
+        'м2' AS unit,
+        round((random() * 10000)::numeric, 2) AS planned_amount,
+        round((random() * 10000)::numeric, 2) AS fact_amount_done,
+        round((random() * 1000)::numeric, 2) AS delta_amount_done
+    FROM generate_series(1, %(rows)s) AS i;
+"""
+
+
+async def measure(conn, batch_size: int) -> int:
+    tracemalloc.start()
+    aggregator = _PlanFactAggregator()
+    async for cols, chunk in _stream_rows_async(conn, ITEMS_SQL, (MONTH_START,), batch_size=batch_size):
+        aggregator.add_rows(chunk, cols)
+    aggregator.work_items()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+async def run(dsn: str) -> None:
+    # Одно соединение на весь замер: временная таблица видна только в его сессии.
+    async with aiopg.connect(dsn) as conn:
+        print(f"{'rows':>10} {'fetchall, MiB':>14} {'stream, MiB':>12}")
+        for count in ROW_COUNTS:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    SEED_SQL,
+                    {"month": MONTH_START, "rows": count, "descriptions": DESCRIPTIONS},
+                )
+            fetchall_peak = await measure(conn, 0)
+            stream_peak = await measure(conn, STREAM_BATCH_SIZE)
+            print(f"{count:>10} {fetchall_peak / 2**20:>14.1f} {stream_peak / 2**20:>12.1f}")
+
+
+def main() -> None:
+    dsn = get_settings().db_dsn
+    if not dsn:
+        raise SystemExit("DB_DSN не задан")
+
+    asyncio.run(run(dsn))
+
+
+if __name__ == "__main__":
+    main()
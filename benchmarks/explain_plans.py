@@ -0,0 +1,228 @@
+"""Планы выполнения всех запросов приложения и сравнение с сохранённым базовым.
+
+Для каждого SQL, который может выполнить приложение (строки `*_SQL` из
+`app/queries.py` и `app/visit_logger.py`, цепочки `FactQueryBuilder` и пакет
+дашборда), выполняется `EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)`. Каждый
+запрос идёт в отдельной транзакции с откатом, поэтому UPSERT визита ничего
+не записывает. Планы сохраняются в `benchmarks/plans/current/`.
+
+Отмечаются:
+  * Seq Scan по таблицам (новые относительно базового плана — регрессия);
+  * расхождение оценки строк планировщика с фактом в `ROW_ESTIMATE_FACTOR`
+    и более раз (регрессия, если в базовом плане оно было заметно меньше).
+
+Запускать на локальной БД с синтетическими данными (DB_DSN, как у приложения;
+заполнить её можно `benchmarks.synthetic_data`). Из корня репозитория:
+
+    DB_DSN=postgresql://... python -m benchmarks.explain_plans
+    DB_DSN=postgresql://... python -m benchmarks.explain_plans --save-baseline
+
+При найденных регрессиях код возврата 1.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+from datetime import date
+from pathlib import Path
+from typing import Any, Iterator
+
+from psycopg2 import connect
+
+from app.config import get_settings
+from app.queries import (
+    AVAILABLE_MONTHS_SQL,
+    CONTRACT_EXECUTED_SQL,
+    CONTRACT_TOTAL_SQL,
+    ITEMS_ROLLUP_SQL,
+    ITEMS_SQL,
+    LAST_UPDATED_SQL,
+    RANGE_TOTALS_SQL,
+    SUMMARY_SQL,
+    _available_days_query,
+    _batch_query,
+    _daily_fact_totals_query,
+    _daily_report_query,
+    _dashboard_statements,
+    _range_months,
+    _work_breakdown_query,
+    _works_breakdown_query,
+)
+from app.visit_logger import UPSERT_VISIT_SQL
+
+PLANS_DIR = Path(__file__).with_name("plans")
+# Во сколько раз оценка строк может расходиться с фактом без предупреждения.
+ROW_ESTIMATE_FACTOR = 10.0
+# Узлы, где и оценка, и факт меньше этого числа строк, не проверяются.
+ROW_ESTIMATE_MIN_ROWS = 100
+
+SAMPLE_SQL = """
+    SELECT
+        (SELECT MAX(month_start) FROM skpdi_plan_vs_fact_monthly) AS month_start,
+        (SELECT MAX(date_done)::date FROM skpdi_fact_with_money WHERE status = 'Рассмотрено') AS work_date,
+        (
+            SELECT description
+            FROM skpdi_fact_with_money
+            WHERE status = 'Рассмотрено' AND description IS NOT NULL
+            GROUP BY description
+            ORDER BY COUNT(*) DESC
+            LIMIT 1
+        ) AS description;
+"""
+
+
+def sample_params(conn) -> tuple[date, date, str]:
+    """Месяц, день и работа, на которых строятся планы (самые свежие данные)."""
+
+    with conn.cursor() as cur:
+        cur.execute(SAMPLE_SQL)
+        month_start, work_date, description = cur.fetchone()
+    conn.rollback()
+    today = date.today()
+    return month_start or today.replace(day=1), work_date or today, description or ""
+
+
+def statements(month_start: date, work_date: date, work: str) -> dict[str, tuple[str, tuple[object, ...]]]:
+    """Все запросы приложения с реалистичными параметрами."""
+
+    year_months = _range_months(month_start.replace(month=1), month_start)
+    return {
+        "items": (ITEMS_SQL, (month_start,)),
+        "items_rollup": (ITEMS_ROLLUP_SQL, (month_start,)),
+        "available_months": (AVAILABLE_MONTHS_SQL, (12,)),
+        "last_updated": (LAST_UPDATED_SQL, ()),
+        "range_totals": (RANGE_TOTALS_SQL, (year_months,)),
+        "contract_total": (CONTRACT_TOTAL_SQL, ()),
+        "contract_executed": (CONTRACT_EXECUTED_SQL, ()),
+        "summary": (SUMMARY_SQL, (month_start,)),
+        "daily_fact_totals": _daily_fact_totals_query(month_start),
+        "daily_fact_totals_tail": _daily_fact_totals_query(month_start, max(month_start, work_date.replace(day=1))),
+        "work_breakdown": _work_breakdown_query(month_start, work),
+        "works_breakdown_month": _works_breakdown_query(month_start),
+        "works_breakdown_batch": _works_breakdown_query(month_start, [work, work[: len(work) // 2]]),
+        "available_days": _available_days_query(),
+        "daily_report": _daily_report_query(work_date),
+        "dashboard_batch": _batch_query(_dashboard_statements(month_start, daily_since=month_start)),
+        "upsert_visit": (
+            UPSERT_VISIT_SQL,
+            ("/dashboard", "127.0.0.1", "explain", "explain-user", "explain-session", 1, "desktop", None, None),
+        ),
+    }
+
+
+def explain(conn, sql: str, params: tuple[object, ...]) -> dict[str, Any]:
+    with conn.cursor() as cur:
+        try:
+            cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql.strip().rstrip(";"), params)
+            (plan,) = cur.fetchone()
+        finally:
+            conn.rollback()
+    return plan[0]
+
+
+def _nodes(node: dict[str, Any], path: str = "0") -> Iterator[tuple[str, dict[str, Any]]]:
+    yield path, node
+    for index, child in enumerate(node.get("Plans", ())):
+        yield from _nodes(child, f"{path}.{index}")
+
+
+def _label(node: dict[str, Any]) -> str:
+    relation = node.get("Relation Name")
+    return f"{node['Node Type']} on {relation}" if relation else node["Node Type"]
+
+
+def summarize(plan: dict[str, Any]) -> dict[str, Any]:
+    """Сводка плана: время, буферы, Seq Scan и худшая оценка строк."""
+
+    root = plan["Plan"]
+    seq_scans: set[str] = set()
+    worst_factor, worst_node = 1.0, ""
+    for path, node in _nodes(root):
+        if node["Node Type"] == "Seq Scan":
+            seq_scans.add(node["Relation Name"])
+        if node.get("Actual Loops", 0) == 0:
+            continue
+        estimated, actual = node["Plan Rows"], node["Actual Rows"]
+        if max(estimated, actual) < ROW_ESTIMATE_MIN_ROWS:
+            continue
+        factor = max(estimated, actual) / max(min(estimated, actual), 1)
+        if factor > worst_factor:
+            worst_factor, worst_node = factor, f"{path} {_label(node)} ({estimated} est / {actual} act)"
+    return {
+        "execution_ms": plan.get("Execution Time", 0.0),
+        "shared_blocks": root.get("Shared Hit Blocks", 0) + root.get("Shared Read Blocks", 0),
+        "seq_scans": sorted(seq_scans),
+        "worst_factor": worst_factor,
+        "worst_node": worst_node,
+    }
+
+
+def regressions(current: dict[str, Any], baseline: dict[str, Any] | None) -> list[str]:
+    """Что ухудшилось относительно базового плана (без базового — только оценки строк)."""
+
+    problems: list[str] = []
+    known_scans = set(baseline["seq_scans"]) if baseline else set()
+    if baseline is not None:
+        problems.extend(f"новый Seq Scan on {relation}" for relation in current["seq_scans"] if relation not in known_scans)
+    baseline_factor = baseline["worst_factor"] if baseline else 1.0
+    if current["worst_factor"] >= ROW_ESTIMATE_FACTOR and current["worst_factor"] > 2 * baseline_factor:
+        problems.append(f"оценка строк x{current['worst_factor']:.0f}: {current['worst_node']}")
+    return problems
+
+
+def _load_plan(path: Path) -> dict[str, Any] | None:
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))["plan"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--plans-dir", type=Path, default=PLANS_DIR)
+    parser.add_argument("--save-baseline", action="store_true", help="сохранить текущие планы как базовые")
+    args = parser.parse_args()
+
+    dsn = get_settings().db_dsn
+    if not dsn:
+        raise SystemExit("DB_DSN не задан")
+
+    current_dir, baseline_dir = args.plans_dir / "current", args.plans_dir / "baseline"
+    current_dir.mkdir(parents=True, exist_ok=True)
+
+    conn = connect(dsn)
+    failed = False
+    try:
+        params = sample_params(conn)
+        print(f"месяц {params[0]}, день {params[1]}, работа {params[2]!r}")
+        print(f"{'statement':<24} {'ms':>9} {'base ms':>9} {'blocks':>8} {'seq scans':<40} problems")
+        for name, (sql, statement_params) in statements(*params).items():
+            plan = explain(conn, sql, statement_params)
+            (current_dir / f"{name}.json").write_text(
+                json.dumps({"sql": sql, "params": statement_params, "plan": plan}, ensure_ascii=False, indent=2, default=str),
+                encoding="utf-8",
+            )
+            current = summarize(plan)
+            baseline_plan = _load_plan(baseline_dir / f"{name}.json")
+            baseline = summarize(baseline_plan) if baseline_plan else None
+            problems = regressions(current, baseline)
+            failed = failed or bool(problems)
+            base_ms = f"{baseline['execution_ms']:.2f}" if baseline else "-"
+            print(
+                f"{name:<24} {current['execution_ms']:>9.2f} {base_ms:>9} {current['shared_blocks']:>8} "
+                f"{', '.join(current['seq_scans']) or '-':<40} {'; '.join(problems)}"
+            )
+    finally:
+        conn.close()
+
+    if args.save_baseline:
+        shutil.rmtree(baseline_dir, ignore_errors=True)
+        shutil.copytree(current_dir, baseline_dir)
+        print(f"базовые планы сохранены в {baseline_dir}")
+    elif failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
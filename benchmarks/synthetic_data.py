@@ -0,0 +1,277 @@
+"""Синтетические данные СКПДИ для нагрузочных замеров в одноразовой БД.
+
+Пересоздаёт таблицы, которые читает приложение, и заполняет их данными
+заданного масштаба (1 — примерно текущий объём, см. константы ниже):
+
+  * `skpdi_fact_with_money` — строки факта за последние `MONTHS` месяцев
+    по сегодняшний день, ~10% ещё не рассмотрены;
+  * `skpdi_plan_vs_fact_monthly` — план по работам за каждый месяц, факт
+    собран из `skpdi_fact_with_money` (внерегламент — только факт);
+  * `skpdi_fact_agg` / `skpdi_plan_agg` — водяные знаки загрузок `loaded_at`;
+  * `podolsk_mad_2025_contract_amount` и материализованное представление
+    `skpdi_fact_monthly_cat_mv`;
+  * `dashboard_visits` с уникальным индексом (user_id, session_id).
+
+После загрузки применяются индексы из `migrations/` и выполняется ANALYZE.
+
+ВНИМАНИЕ: существующие таблицы с этими именами удаляются. Поэтому без флага
+`--recreate` скрипт ничего не делает. Запуск из корня репозитория:
+
+    DB_DSN=postgresql://.../mad_synthetic python -m benchmarks.synthetic_data --scale 10 --recreate
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import date
+from pathlib import Path
+
+from psycopg2 import connect
+
+from app.config import get_settings
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+SCALES = (1, 10, 100)
+
+# Объёмы при масштабе 1 (оценка текущих данных). Число месяцев не масштабируется:
+# растёт плотность данных, а не глубина истории.
+MONTHS = 12
+WORKS = 400
+FACT_ROWS_PER_DAY = 150
+CONTRACT_LINES = 300
+VISITS = 20_000
+VISIT_USERS = 500
+
+SCHEMA_SQL = """
+    DROP MATERIALIZED VIEW IF EXISTS skpdi_fact_monthly_cat_mv;
+    DROP TABLE IF EXISTS
+        skpdi_fact_with_money,
+        skpdi_plan_vs_fact_monthly,
+        skpdi_fact_agg,
+        skpdi_plan_agg,
+        podolsk_mad_2025_contract_amount,
+        dashboard_visits;
+
+    CREATE TABLE skpdi_fact_with_money (
+        date_done timestamp,
+        month_start date,
+        status text,
+        smeta_code text,
+        smeta_section text,
+        description text,
+        unit text,
+        total_volume numeric,
+        total_amount numeric
+    );
+    CREATE TABLE skpdi_plan_vs_fact_monthly (
+        month_start date,
+        smeta_code text,
+        description text,
+        unit text,
+        planned_amount numeric,
+        fact_amount_done numeric,
+        delta_amount_done numeric
+    );
+    CREATE TABLE skpdi_fact_agg (loaded_at timestamptz);
+    CREATE TABLE skpdi_plan_agg (loaded_at timestamptz);
+    CREATE TABLE podolsk_mad_2025_contract_amount (contract_amount numeric);
+    CREATE TABLE dashboard_visits (
+        id serial PRIMARY KEY,
+        visited_at timestamp DEFAULT now(),
+        endpoint text,
+        client_ip text,
+        user_agent text,
+        user_id text,
+        session_id text,
+        session_duration_sec integer,
+        device_type text,
+        browser text,
+        os text
+    );
+    CREATE UNIQUE INDEX dashboard_visits_user_session_uidx ON dashboard_visits (user_id, session_id);
+"""
+
+FACT_SQL = """
+    INSERT INTO skpdi_fact_with_money
+    SELECT
+        day + make_interval(mins => (420 + random() * 660)::int),
+        date_trunc('month', day)::date,
+        CASE WHEN random() < 0.9 THEN 'Рассмотрено' ELSE 'На рассмотрении' END,
+        CASE
+            WHEN vnr THEN (ARRAY['внерегл_ч_1', 'внерегл_ч_2'])[1 + n %% 2]
+            WHEN n %% 2 = 0 THEN 'лето'
+            ELSE 'зима'
+        END,
+        'Раздел ' || (1 + n %% 20),
+        CASE WHEN vnr THEN 'Внерегламентная работа №' || n ELSE 'Работа №' || n END,
+        (ARRAY['м2', 'м3', 'шт', 'п.м', 'т'])[1 + n %% 5],
+        volume,
+        round(volume * (50 + n %% 200), 2)
+    FROM (
+        SELECT
+            day,
+            random() < 0.05 AS vnr,
+            1 + floor(random() * %(works)s)::int AS n,
+            round((random() * 100)::numeric, 3) AS volume
+        FROM generate_series(%(first_day)s::date, %(last_day)s::date, interval '1 day') AS day,
+            generate_series(1, %(rows_per_day)s)
+    ) AS src;
+"""
+
+PLAN_VS_FACT_SQL = """
+    INSERT INTO skpdi_plan_vs_fact_monthly
+    WITH plan AS (
+        SELECT
+            month_start::date AS month_start,
+            CASE WHEN n %% 2 = 0 THEN 'лето' ELSE 'зима' END AS smeta_code,
+            'Работа №' || n AS description,
+            (ARRAY['м2', 'м3', 'шт', 'п.м', 'т'])[1 + n %% 5] AS unit,
+            round((random() * 200000)::numeric, 2) AS planned_amount
+        FROM generate_series(%(first_day)s::date, %(last_day)s::date, interval '1 month') AS month_start,
+            generate_series(1, %(works)s) AS n
+    ),
+    fact AS (
+        SELECT month_start, smeta_code, description, MAX(unit) AS unit, SUM(total_amount) AS fact_amount
+        FROM skpdi_fact_with_money
+        WHERE status = 'Рассмотрено'
+        GROUP BY month_start, smeta_code, description
+    )
+    SELECT
+        month_start,
+        smeta_code,
+        description,
+        COALESCE(plan.unit, fact.unit),
+        plan.planned_amount,
+        COALESCE(fact.fact_amount, 0),
+        COALESCE(fact.fact_amount, 0) - COALESCE(plan.planned_amount, 0)
+    FROM plan
+    FULL JOIN fact USING (month_start, smeta_code, description);
+"""
+
+LOADS_SQL = """
+    INSERT INTO skpdi_fact_agg
+    SELECT now() - random() * interval '30 days' FROM generate_series(1, %(agg_rows)s);
+    INSERT INTO skpdi_plan_agg
+    SELECT now() - random() * interval '30 days' FROM generate_series(1, %(agg_rows)s);
+"""
+
+CONTRACT_SQL = """
+    INSERT INTO podolsk_mad_2025_contract_amount
+    SELECT round((random() * 1000000)::numeric, 2) FROM generate_series(1, %(contract_lines)s);
+
+    CREATE MATERIALIZED VIEW skpdi_fact_monthly_cat_mv AS
+    SELECT month_start, smeta_code AS category, SUM(total_amount) AS category_amount
+    FROM skpdi_fact_with_money
+    WHERE status = 'Рассмотрено'
+    GROUP BY month_start, smeta_code;
+"""
+
+VISITS_SQL = """
+    INSERT INTO dashboard_visits (
+        visited_at, endpoint, client_ip, user_agent, user_id, session_id,
+        session_duration_sec, device_type, browser, os
+    )
+    SELECT
+        %(first_day)s::date + random() * (%(last_day)s::date - %(first_day)s::date + 1) * interval '1 day',
+        (ARRAY['/dashboard', '/dashboard/daily', '/dashboard/pdf', '/dashboard/range'])[1 + i %% 4],
+        '10.0.' || (i %% 250) || '.' || (i %% 200),
+        'Mozilla/5.0',
+        'user-' || (i %% %(visit_users)s),
+        md5(i::text),
+        (random() * 1800)::int,
+        (ARRAY['desktop', 'mobile'])[1 + i %% 2],
+        (ARRAY['chrome', 'firefox', 'safari', 'edge'])[1 + i %% 4],
+        (ARRAY['windows', 'android', 'ios', 'macos', 'linux'])[1 + i %% 5]
+    FROM generate_series(1, %(visits)s) AS i;
+"""
+
+
+def volumes(scale: int) -> dict[str, object]:
+    """Параметры генерации для масштаба `scale` (данные по сегодняшний день)."""
+
+    today = date.today()
+    first_month = today.month - MONTHS + 1
+    first_day = date(today.year + (first_month - 1) // 12, (first_month - 1) % 12 + 1, 1)
+    return {
+        "first_day": first_day,
+        "last_day": today,
+        "works": WORKS * scale,
+        "rows_per_day": FACT_ROWS_PER_DAY * scale,
+        "agg_rows": WORKS * MONTHS * scale,
+        "contract_lines": CONTRACT_LINES * scale,
+        "visits": VISITS * scale,
+        "visit_users": VISIT_USERS * scale,
+    }
+
+
+def _migration_statements() -> list[str]:
+    # CREATE INDEX CONCURRENTLY нельзя выполнять пачкой: по одной команде.
+    statements: list[str] = []
+    for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        lines = [line for line in path.read_text(encoding="utf-8").splitlines() if not line.lstrip().startswith("--")]
+        statements.extend(part.strip() for part in "\n".join(lines).split(";") if part.strip())
+    return statements
+
+
+def seed(conn, scale: int) -> dict[str, int]:
+    """Пересоздаёт таблицы и заполняет их; возвращает число строк по таблицам."""
+
+    params = volumes(scale)
+    with conn.cursor() as cur:
+        cur.execute(SCHEMA_SQL)
+        for sql in (FACT_SQL, PLAN_VS_FACT_SQL, LOADS_SQL, CONTRACT_SQL, VISITS_SQL):
+            cur.execute(sql, params)
+    conn.commit()
+
+    autocommit, conn.autocommit = conn.autocommit, True
+    try:
+        with conn.cursor() as cur:
+            for statement in _migration_statements():
+                cur.execute(statement)
+            cur.execute("ANALYZE")
+    finally:
+        conn.autocommit = autocommit
+
+    counts: dict[str, int] = {}
+    with conn.cursor() as cur:
+        for table in (
+            "skpdi_fact_with_money",
+            "skpdi_plan_vs_fact_monthly",
+            "skpdi_fact_agg",
+            "skpdi_plan_agg",
+            "podolsk_mad_2025_contract_amount",
+            "skpdi_fact_monthly_cat_mv",
+            "dashboard_visits",
+        ):
+            cur.execute(f"SELECT COUNT(*) FROM {table}")
+            counts[table] = cur.fetchone()[0]
+    conn.rollback()
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, choices=SCALES, default=1)
+    parser.add_argument("--recreate", action="store_true", help="подтвердить удаление и пересоздание таблиц")
+    args = parser.parse_args()
+
+    dsn = get_settings().db_dsn
+    if not dsn:
+        raise SystemExit("DB_DSN не задан")
+    if not args.recreate:
+        raise SystemExit("Таблицы в DB_DSN будут удалены: добавьте --recreate, если это одноразовая БД")
+
+    conn = connect(dsn)
+    try:
+        started = time.perf_counter()
+        counts = seed(conn, args.scale)
+        print(f"масштаб {args.scale}x, {time.perf_counter() - started:.1f} с")
+        for table, count in counts.items():
+            print(f"{table:<36} {count:>12,}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+-- Индексы для запросов FactQueryBuilder к skpdi_fact_with_money.
+--
+-- Все запросы дашборда фильтруют по status = 'Рассмотрено' и полуоткрытому
+-- диапазону date_done (день, месяц), поэтому ведущие колонки — (status, date_done).
+-- description в конце индекса покрывает группировки расшифровки по работам.
+-- Если skpdi_fact_with_money — представление, индексы нужно создать
+-- на соответствующих колонках базовой таблицы.
+--
+-- CONCURRENTLY не блокирует запись, но не работает внутри транзакции:
+-- применять отдельной командой, например
+--     psql "$DB_DSN" -f migrations/001_fact_with_money_indexes.sql
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS skpdi_fact_with_money_status_date_done_description_idx
+    ON skpdi_fact_with_money (status, date_done, description);
+
+-- Подневные итоги месяца (_daily_fact_totals_query) фильтруют по month_start.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS skpdi_fact_with_money_status_month_start_idx
+    ON skpdi_fact_with_money (status, month_start);
+
+ANALYZE skpdi_fact_with_money;
@@ -0,0 +1,15 @@
+"""Общие настройки тестов: импорт пакета `app` из корня репозитория.
+
+Тесты не обращаются к БД. Запуск из корня репозитория:
+
+    python -m pytest -q
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
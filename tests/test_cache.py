@@ -0,0 +1,135 @@
+"""Кеши по водяному знаку: уровни `TieredWatermarkCache` и срок `IncrementalSeriesCache`."""
+
+from __future__ import annotations
+
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from app import cache as cache_module
+from app.cache import IncrementalSeriesCache, TieredWatermarkCache, WatermarkLRUCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Управляемое `time.monotonic()` внутри `app.cache`."""
+
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def test_lru_cache_resets_on_new_watermark():
+    cache: WatermarkLRUCache[str, int] = WatermarkLRUCache(2)
+    assert cache.get("a", "w1") is None
+    cache.put("a", 1, "w1")
+    assert cache.get("a", "w1") == 1
+    assert cache.get("a", "w2") is None
+    # Значение, посчитанное при старом водяном знаке, не сохраняется.
+    cache.put("a", 1, "w1")
+    assert cache.get("a", "w2") is None
+
+
+def test_tiered_open_entry_follows_watermark():
+    cache: TieredWatermarkCache[date, str] = TieredWatermarkCache(4, closed_ttl_sec=3600)
+    cache.put(date(2025, 6, 1), "june", "w1", closed=False)
+    assert cache.get(date(2025, 6, 1), "w1", closed=False) == "june"
+    assert cache.get(date(2025, 6, 1), "w2", closed=False) is None
+
+
+def test_tiered_open_entry_expires_by_ttl(clock):
+    cache: TieredWatermarkCache[date, str] = TieredWatermarkCache(4, closed_ttl_sec=3600, open_ttl_sec=60)
+    cache.put(date(2025, 6, 1), "june", "w1", closed=False)
+    clock.value += 59
+    assert cache.get(date(2025, 6, 1), "w1", closed=False) == "june"
+    clock.value += 1
+    assert cache.get(date(2025, 6, 1), "w1", closed=False) is None
+
+
+def test_tiered_closed_entry_survives_loads_until_ttl(clock):
+    cache: TieredWatermarkCache[date, str] = TieredWatermarkCache(4, closed_ttl_sec=3600)
+    cache.put(date(2025, 5, 1), "may", "w1", closed=True)
+    clock.value += 3599
+    assert cache.get(date(2025, 5, 1), "w2", closed=True) == "may"
+    clock.value += 1
+    # Срок вышел: запись действительна только при том же водяном знаке.
+    assert cache.get(date(2025, 5, 1), "w1", closed=True) == "may"
+    assert cache.get(date(2025, 5, 1), "w2", closed=True) is None
+
+
+def test_tiered_entry_is_reread_when_period_closes():
+    cache: TieredWatermarkCache[date, str] = TieredWatermarkCache(4, closed_ttl_sec=3600)
+    cache.put(date(2025, 6, 1), "june-partial", "w1", closed=False)
+    # Месяц закрылся: запись открытого уровня не переходит в закрытый.
+    assert cache.get(date(2025, 6, 1), "w1", closed=True) is None
+    stats = cache.stats()
+    assert stats["size"] == 0
+    assert stats["tiers"]["closed"]["misses"] == 1
+
+
+def test_tiered_cache_evicts_least_recent():
+    cache: TieredWatermarkCache[int, int] = TieredWatermarkCache(2, closed_ttl_sec=3600)
+    cache.put(1, 1, "w1", closed=True)
+    cache.put(2, 2, "w1", closed=True)
+    assert cache.get(1, "w1", closed=True) == 1
+    cache.put(3, 3, "w1", closed=True)
+    assert cache.get(2, "w1", closed=True) is None
+    assert cache.get(1, "w1", closed=True) == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def _series_cache(ttl: float = 3600) -> IncrementalSeriesCache[date, tuple[date, float]]:
+    return IncrementalSeriesCache(4, day=lambda row: row[0], closed_ttl_sec=ttl)
+
+
+def test_series_rereads_only_open_tail():
+    cache = _series_cache()
+    month = date(2025, 6, 1)
+    assert cache.plan(month, "w1", start=month) == ([], month)
+    series = cache.merge(
+        month,
+        [],
+        [(date(2025, 6, 1), 1.0), (date(2025, 6, 2), 2.0), (date(2025, 6, 3), 3.0)],
+        "w1",
+        since=month,
+        open_from=date(2025, 6, 2),
+    )
+    assert cache.plan(month, "w1", start=month) == (series, None)
+
+    known, since = cache.plan(month, "w2", start=month)
+    assert since == date(2025, 6, 2)
+    merged = cache.merge(month, known, [(date(2025, 6, 2), 20.0)], "w2", since=since, open_from=since)
+    assert merged == [(date(2025, 6, 1), 1.0), (date(2025, 6, 2), 20.0)]
+    assert cache.stats()["partial"] == 1
+
+
+def test_series_closed_month_survives_loads():
+    cache = _series_cache()
+    month = date(2025, 5, 1)
+    series = cache.merge(month, [], [(date(2025, 5, 31), 5.0)], "w1", since=month, open_from=None)
+    assert cache.plan(month, "w2", start=month) == (series, None)
+
+
+def test_series_kept_days_expire_from_last_full_read(clock):
+    cache = _series_cache(ttl=100)
+    month = date(2025, 6, 1)
+    cache.merge(month, [], [(date(2025, 6, 1), 1.0)], "w1", since=month, open_from=date(2025, 6, 2))
+
+    clock.value += 60
+    known, since = cache.plan(month, "w2", start=month)
+    assert since == date(2025, 6, 2)
+    cache.merge(month, known, [(date(2025, 6, 2), 2.0)], "w2", since=since, open_from=since)
+
+    # Дочитывание хвоста не продлевает срок сохранённых дней.
+    clock.value += 40
+    assert cache.plan(month, "w3", start=month) == ([], month)
+
+
+def test_series_closed_month_expires(clock):
+    cache = _series_cache(ttl=100)
+    month = date(2025, 5, 1)
+    cache.merge(month, [], [(date(2025, 5, 31), 5.0)], "w1", since=month, open_from=None)
+    clock.value += 100
+    assert cache.plan(month, "w1", start=month)[1] is None
+    assert cache.plan(month, "w2", start=month) == ([], month)
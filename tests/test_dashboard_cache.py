@@ -0,0 +1,84 @@
+"""Кеш ответа дашборда за месяц: деградированный ответ (пакет не удался) не кешируется."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import date
+
+import pytest
+from psycopg2 import errors
+
+from app import queries
+from app.config import Settings
+
+MONTH = date(2025, 6, 1)
+WATERMARK = "load-1"
+# Строка-итог `ITEMS_ROLLUP_SQL` в форме JSON-пакета.
+ROLLUP_ROW = {
+    "is_category_total": True,
+    "category": "лето",
+    "description": None,
+    "month_start": "2025-06-01",
+    "smeta_code": None,
+    "planned_amount": 10.0,
+    "fact_amount_done": 4.0,
+}
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    """Водяной знак и настройки без БД; кеши модуля чистые до и после теста."""
+
+    async def current_async():
+        return WATERMARK
+
+    settings = Settings(plan_fact_rollup=True, db_stream_batch_size=0)
+    monkeypatch.setattr(queries, "get_settings", lambda: settings)
+    monkeypatch.setattr(queries.watermark, "current_async", current_async)
+    queries.clear_caches()
+    yield
+    queries.clear_caches()
+
+
+def _cached():
+    return queries._month_cache.get(queries._month_cache_key(MONTH), WATERMARK)
+
+
+def test_degraded_payload_is_served_but_not_cached(monkeypatch):
+    async def failing_batch(statements):
+        raise errors.UndefinedTable('relation "podolsk_mad_2025_contract_amount" does not exist')
+
+    async def items_only(sql, params=None, **kwargs):
+        yield queries._DICT_ROWS, [ROLLUP_ROW]
+
+    monkeypatch.setattr(queries, "_fetch_batch_async", failing_batch)
+    monkeypatch.setattr(queries, "_iter_rows_async", items_only)
+
+    _, summary, last_updated, _ = asyncio.run(queries.fetch_plan_vs_fact_for_month_async(MONTH))
+
+    assert last_updated == WATERMARK
+    assert summary["fact_amount"] == 4.0
+    assert "contract_amount" not in summary
+    assert "daily_revenue" not in summary
+    assert _cached() is None
+
+
+def test_full_payload_is_cached(monkeypatch):
+    async def batch(statements):
+        assert {"items", "contract_total", "contract_executed", "daily_totals"} <= set(statements)
+        return {
+            "items": [ROLLUP_ROW],
+            "contract_total": [{"contract_total": 100.0}],
+            "contract_executed": [{"executed_total": 25.0}],
+            "daily_totals": [{"work_date": "2025-06-03", "fact_total": 4.0}],
+        }
+
+    monkeypatch.setattr(queries, "_fetch_batch_async", batch)
+
+    result = asyncio.run(queries.fetch_plan_vs_fact_for_month_async(MONTH))
+    _, summary, _, _ = result
+
+    assert summary["contract_amount"] == 100.0
+    assert summary["contract_executed"] == 25.0
+    assert [row.amount for row in summary["daily_revenue"]] == [4.0]
+    assert _cached() == result
@@ -0,0 +1,113 @@
+"""Колоночная агрегация месяца: `MonthFrame` и `MonthWorkBreakdown`."""
+
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.frame import MonthFrame, MonthWorkBreakdown
+from app.queries import _ilike_matcher
+
+MONTH = date(2025, 6, 1)
+ITEM_COLS = {"month_start": 0, "smeta_code": 1, "description": 2, "planned_amount": 3, "fact_amount_done": 4}
+BREAKDOWN_COLS = {"description": 0, "work_date": 1, "total_volume": 2, "unit": 3, "total_amount": 4}
+
+
+def test_month_frame_totals_across_batches():
+    frame = MonthFrame()
+    frame.add_rows(
+        [
+            (MONTH, "лето", "Покос", Decimal("10"), Decimal("4")),
+            (MONTH, "зима", "Уборка", 5.0, None),
+            (MONTH, "внерегл_ч_1", "Аварийный", 100.0, 7.0),
+            (MONTH, "прочее", "Не смета", 1.0, 1.0),
+            (MONTH, " лето ", "Покос", 2.0, 1.0),
+        ],
+        ITEM_COLS,
+    )
+    frame.add_rows(
+        [
+            (MONTH, "зима", "Уборка", 1.0, 1.0),
+            (MONTH, "лето", "Разметка", None, None),
+        ],
+        ITEM_COLS,
+    )
+
+    planned, fact = frame.category_totals()
+    # План внерегламента не учитывается, строки других смет пропускаются.
+    assert planned == {"лето": 12.0, "зима": 6.0, "внерегламент": 0.0}
+    assert fact == {"лето": 5.0, "зима": 1.0, "внерегламент": 7.0}
+    assert len(frame) == 3
+
+    works = list(frame.works())
+    assert [key for key, *_ in works] == [("Покос", "лето"), ("Уборка", "зима"), ("Разметка", "лето")]
+    assert works[0][1] == (MONTH, "лето")
+    assert works[0][2:] == (12.0, 5.0)
+    assert works[1][2:] == (6.0, 1.0)
+
+
+def test_month_frame_works_threshold():
+    frame = MonthFrame()
+    frame.add_rows(
+        [
+            (MONTH, "лето", "Есть план", 1.0, 0.0),
+            (MONTH, "лето", "Пусто", 0.0, 0.0),
+            (MONTH, "зима", "Есть факт", 0.0, 2.0),
+        ],
+        ITEM_COLS,
+    )
+    assert [key[0] for key, *_ in frame.works(0.0)] == ["Есть план", "Есть факт"]
+
+
+def _breakdown() -> MonthWorkBreakdown:
+    return MonthWorkBreakdown(
+        MONTH,
+        [
+            ("Ямочный ремонт", date(2025, 6, 3), 1.5, "м2", 100.0),
+            ("Ямочный ремонт асфальта", "2025-06-03", Decimal("2"), "м3", Decimal("50")),
+            ("Ямочный ремонт", date(2025, 6, 10), None, "м2", None),
+            ("Покос", date(2025, 6, 3), 9.0, "га", 9.0),
+            ("Ямочный ремонт", None, 1.0, "м2", 1.0),
+        ],
+        BREAKDOWN_COLS,
+    )
+
+
+def test_breakdown_series_sums_matching_descriptions_by_day():
+    breakdown = _breakdown()
+    pattern = "%ямочный%"
+    assert len(breakdown) == 4
+    # Как MAX(unit) в SQL: из нескольких описаний за день — наибольшая единица.
+    assert breakdown.series(pattern, _ilike_matcher(pattern)) == [
+        (date(2025, 6, 3), 3.5, "м3", 150.0),
+        (date(2025, 6, 10), 0.0, "м2", 0.0),
+    ]
+
+
+def test_breakdown_series_without_matches():
+    pattern = "%разметка%"
+    assert _breakdown().series(pattern, _ilike_matcher(pattern)) == []
+
+
+def test_breakdown_series_memo_is_bounded():
+    breakdown = _breakdown()
+    for number in range(MonthWorkBreakdown.SERIES_MEMO_SIZE + 5):
+        pattern = f"%работа {number}%"
+        breakdown.series(pattern, _ilike_matcher(pattern))
+    assert len(breakdown._series) == MonthWorkBreakdown.SERIES_MEMO_SIZE
+
+
+@pytest.mark.parametrize(
+    ("pattern", "value", "matches"),
+    [
+        ("%покос%", "Механизированный ПОКОС травы", True),
+        ("%покос%", "Уборка", False),
+        ("%100\\%%", "скидка 100%", True),
+        ("%100\\%%", "скидка 1000", False),
+        ("%a_c%", "xABCx", True),
+    ],
+)
+def test_ilike_matcher(pattern, value, matches):
+    assert bool(_ilike_matcher(pattern)(value)) is matches
@@ -0,0 +1,81 @@
+"""Перечисление месяцев тренда и накопительного периода (`queries._month_starts` и обёртки)."""
+
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+
+from app import queries
+from app.config import Settings
+
+
+def _months_ago(count: int) -> date:
+    month = date.today().replace(day=1)
+    index = month.year * 12 + month.month - 1 - count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+@pytest.fixture
+def contract_start(monkeypatch):
+    """Начало контракта — 5 месяцев назад (независимо от .env и текущей даты)."""
+
+    start = _months_ago(5)
+    settings = Settings(contract_period_start=start)
+    monkeypatch.setattr(queries, "get_settings", lambda: settings)
+    return start
+
+
+def test_month_starts_crosses_year_and_normalizes_days():
+    assert queries._month_starts(date(2024, 11, 15), date(2025, 2, 3)) == [
+        date(2024, 11, 1),
+        date(2024, 12, 1),
+        date(2025, 1, 1),
+        date(2025, 2, 1),
+    ]
+
+
+def test_month_starts_single_month():
+    assert queries._month_starts(date(2025, 6, 30), date(2025, 6, 1)) == [date(2025, 6, 1)]
+
+
+def test_month_starts_rejects_reversed_period():
+    with pytest.raises(ValueError):
+        queries._month_starts(date(2025, 7, 1), date(2025, 6, 1))
+
+
+def test_range_months_is_capped():
+    start = date(2022, 1, 1)
+    assert len(queries._range_months(start, date(2024, 12, 1))) == queries._RANGE_MAX_MONTHS
+    with pytest.raises(ValueError):
+        queries._range_months(start, date(2025, 1, 1))
+    with pytest.raises(ValueError):
+        queries.validate_range(start, date(2025, 1, 1))
+
+
+def test_period_defaults_to_contract_start(contract_start):
+    months = queries._period_months(None)
+    assert months[0] == contract_start
+    assert months[-1] == date.today().replace(day=1)
+    assert len(months) == 6
+
+
+def test_period_may_start_inside_contract_month(contract_start):
+    assert queries._period_months(contract_start.replace(day=20))[0] == contract_start
+    assert len(queries._period_months(_months_ago(1))) == 2
+
+
+@pytest.mark.parametrize("period_start", [date(1, 1, 1), date(2000, 1, 1)])
+def test_period_before_contract_is_rejected(contract_start, period_start):
+    with pytest.raises(ValueError):
+        queries.validate_period(period_start)
+
+
+def test_period_month_before_contract_is_rejected(contract_start):
+    with pytest.raises(ValueError):
+        queries._period_months(_months_ago(6))
+
+
+def test_period_in_future_is_rejected(contract_start):
+    with pytest.raises(ValueError):
+        queries.validate_period(_months_ago(-1))
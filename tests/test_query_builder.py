@@ -0,0 +1,55 @@
+"""SQL `FactQueryBuilder`: полуоткрытые диапазоны дат и поиск по описанию."""
+
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+
+from app.query_builder import FactQueryBuilder, shape_of
+
+
+def test_date_range_is_half_open_on_raw_column():
+    sql, params = FactQueryBuilder().select("1").date_range(date(2025, 6, 1), date(2025, 7, 1)).build()
+    assert "date_done >= %s" in sql
+    assert "date_done < %s" in sql
+    # Колонка не приводится к date, иначе индекс по date_done не используется.
+    assert "date_done::date >=" not in sql
+    assert params == (date(2025, 6, 1), date(2025, 7, 1))
+
+
+def test_date_equals_covers_one_day():
+    sql, params = FactQueryBuilder().select("1").date_equals(date(2025, 12, 31)).build()
+    assert "date_done >= %s\n    AND date_done < %s" in sql
+    assert params == (date(2025, 12, 31), date(2026, 1, 1))
+
+
+def test_ilike_any_description_passes_patterns_as_array():
+    sql, params = (
+        FactQueryBuilder()
+        .select("description")
+        .status()
+        .ilike_any_description(pattern for pattern in ("%покос%", "%ремонт%"))
+        .build()
+    )
+    assert "COALESCE(description::text, '') ILIKE ANY(%s)" in sql
+    assert params == ("Рассмотрено", ["%покос%", "%ремонт%"])
+
+
+def test_params_follow_filter_order():
+    sql, params = (
+        FactQueryBuilder()
+        .select("date_done::date AS work_date")
+        .month_start(date(2025, 6, 1))
+        .date_range(date(2025, 6, 10), date(2025, 7, 1))
+        .status()
+        .group_by("work_date")
+        .build()
+    )
+    assert params == (date(2025, 6, 1), date(2025, 6, 10), date(2025, 7, 1), "Рассмотрено")
+    assert shape_of(sql) == "fact[month_start,date_range,status]/work_date"
+
+
+def test_build_requires_select():
+    with pytest.raises(ValueError):
+        FactQueryBuilder().status().build()